@@ -1,5 +1,6 @@
 import os
 import sys
+import pkgutil
 from config import Config
 
 # Add bot directory to sys.path
@@ -10,6 +11,8 @@ if current_dir not in sys.path:
 # Get bot username from config
 bot_username = Config.BOT_USERNAME
 
+# Keep these as lists: filters.command only accepts str or list,
+# and already turns them into a set for matching
 class CMD:
     START = ["start", f"start@{bot_username}"]
     HELP = ["help", f"help@{bot_username}"]
@@ -21,7 +24,13 @@ class CMD:
 
 cmd = CMD()
 
-# Define plugins for Pyrogram
+# Define plugins for Pyrogram, with an explicit include list so it imports the
+# handler modules directly instead of globbing the plugins folder at startup
+PLUGIN_MODULES = sorted(
+    name for _, name, is_pkg in pkgutil.iter_modules([os.path.join(current_dir, "modules")])
+    if not is_pkg
+)
 plugins = {
-    "root": "bot.modules"
+    "root": "bot.modules",
+    "include": PLUGIN_MODULES
 }
@@ -134,6 +134,49 @@ class DownloadHistory(DataBaseHandle):
         self.ccur(cur)
         return results
 
+class UploadCache(DataBaseHandle):
+    def __init__(self, dburl=None):
+        if dburl is None:
+            dburl = Config.DATABASE_URL
+        super().__init__(dburl)
+
+        # Telegram file_id of already uploaded media
+        schema = """
+        CREATE TABLE IF NOT EXISTS upload_cache (
+            cache_key VARCHAR(64) PRIMARY KEY,
+            file_id VARCHAR(255) NOT NULL,
+            date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """
+        cur = self.scur()
+        cur.execute(schema)
+        self._conn.commit()
+        self.ccur(cur)
+
+    def get_file_id(self, cache_key):
+        sql = "SELECT file_id FROM upload_cache WHERE cache_key = %s"
+        cur = self.scur()
+        cur.execute(sql, (cache_key,))
+        row = cur.fetchone()
+        self.ccur(cur)
+        return row[0] if row else None
+
+    def set_file_id(self, cache_key, file_id):
+        sql = """
+        INSERT INTO upload_cache (cache_key, file_id) VALUES (%s, %s)
+        ON CONFLICT (cache_key) DO UPDATE SET file_id = EXCLUDED.file_id
+        """
+        cur = self.scur()
+        cur.execute(sql, (cache_key, file_id))
+        self.ccur(cur)
+
+    def delete_file_id(self, cache_key):
+        sql = "DELETE FROM upload_cache WHERE cache_key = %s"
+        cur = self.scur()
+        cur.execute(sql, (cache_key,))
+        self.ccur(cur)
+
 # Initialize database handlers
 set_db = BotSettings()
 download_history = DownloadHistory()
+upload_cache = UploadCache()
@@ -7,6 +7,7 @@ from .dzapi import deezerapi
 from ..utils import *
 from ..uploader import *
 from ..metadata import set_metadata, get_audio_extension
+from ..message import UserCtx
 
 from ...settings import bot_set
 import bot.helpers.translations as lang
@@ -14,7 +15,7 @@ import bot.helpers.translations as lang
 
 
 
-async def start_deezer(url:str, user: dict):
+async def start_deezer(url:str, user: UserCtx):
     media_type, item_id = await deezerapi.custom_url_parse(url)
 
     if media_type == 'artist':
@@ -27,7 +28,7 @@ async def start_deezer(url:str, user: dict):
         await start_playlist(item_id, user)
 
 
-async def start_track(item_id: int, user: dict, track_meta: dict | None, upload=True, \
+async def start_track(item_id: int, user: UserCtx, track_meta: dict | None, upload=True, \
     filepath=None, disable_link=False):
 
     if not track_meta:
@@ -38,11 +39,11 @@ async def start_track(item_id: int, user: dict, track_meta: dict | None, upload=
 
         raw_data['DATA'] = raw_data['FALLBACK'] if 'FALLBACK' in raw_data.keys() else raw_data['DATA']
         try:
-            track_meta = await process_track_metadata(item_id, user['r_id'])
+            track_meta = await process_track_metadata(item_id, user.r_id)
         except Exception as e:
             return await send_message(user, e)
             
-        filepath = f"{Config.DOWNLOAD_BASE_DIR}/{user['r_id']}/{track_meta['provider']}/{track_meta['albumartist']}/{track_meta['album']}"
+        filepath = f"{Config.DOWNLOAD_BASE_DIR}/{user.r_id}/{track_meta['provider']}/{track_meta['albumartist']}/{track_meta['album']}"
 
     url = await deezerapi.get_track_url(
         item_id, 
@@ -51,7 +52,7 @@ async def start_track(item_id: int, user: dict, track_meta: dict | None, upload=
         track_meta['quality'])
 
     track_meta['folderpath'] = filepath
-    filename = await format_string(Config.TRACK_NAME_FORMAT, track_meta, user)
+    filename = format_string(Config.TRACK_NAME_FORMAT, track_meta, user)
 
     track_meta['extension'] = 'flac' if track_meta['quality'] == 'FLAC' else 'mp3'
 
@@ -68,15 +69,15 @@ async def start_track(item_id: int, user: dict, track_meta: dict | None, upload=
     return True
 
 
-async def start_album(album_id:int, user:dict, upload=True):
+async def start_album(album_id:int, user:UserCtx, upload=True):
     try:
         raw_data = await deezerapi.get_album(album_id)
     except Exception as e:
         return await send_message(user, e)
 
-    album_meta = await process_album_metadata(album_id, raw_data['DATA'], raw_data['SONGS'], user['r_id'])
+    album_meta = await process_album_metadata(album_id, raw_data['DATA'], raw_data['SONGS'], user.r_id)
     
-    album_folder = f"{Config.DOWNLOAD_BASE_DIR}/{user['r_id']}/{album_meta['provider']}/{album_meta['artist']}/{album_meta['title']}"
+    album_folder = f"{Config.DOWNLOAD_BASE_DIR}/{user.r_id}/{album_meta['provider']}/{album_meta['artist']}/{album_meta['title']}"
     
     album_folder = sanitize_filepath(album_folder)
     album_meta['folderpath'] = album_folder
@@ -91,19 +92,19 @@ async def start_album(album_id:int, user:dict, upload=True):
 
     update_details = {
         'text': lang.s.DOWNLOAD_PROGRESS,
-        'msg': user['bot_msg'],
+        'msg': user.bot_msg,
         'title': album_meta['title'],
         'type': album_meta['type']
     }
     await run_concurrent_tasks(tasks, update_details)
 
     if bot_set.album_zip:
-        await edit_message(user['bot_msg'], lang.s.ZIPPING)
+        await edit_message(user.bot_msg, lang.s.ZIPPING)
         album_meta['folderpath'] = await zip_handler(album_meta['folderpath'])
 
     # Upload
     if upload:
-        await edit_message(user['bot_msg'], lang.s.UPLOADING)
+        await edit_message(user.bot_msg, lang.s.UPLOADING)
         await album_upload(album_meta, user)
 
 
@@ -125,9 +126,9 @@ async def start_artist(artist_id, user):
 async def start_playlist(playlist_id, user):
     raw_data = await deezerapi.get_playlist(playlist_id, -1, 0)
 
-    play_meta = await process_playlist_meta(raw_data, user['r_id'])
+    play_meta = await process_playlist_meta(raw_data, user.r_id)
 
-    playlist_folder = f"{Config.DOWNLOAD_BASE_DIR}/{user['r_id']}/{play_meta['provider']}/"
+    playlist_folder = f"{Config.DOWNLOAD_BASE_DIR}/{user.r_id}/{play_meta['provider']}/"
 
     # temp variable (telegram upload doesnt need sorting)
     playlist_sort = False if bot_set.upload_mode == 'Telegram' else bot_set.playlist_sort
@@ -140,7 +141,7 @@ async def start_playlist(playlist_id, user):
 
     update_details = {
         'text': lang.s.DOWNLOAD_PROGRESS,
-        'msg': user['bot_msg'],
+        'msg': user.bot_msg,
         'title': play_meta['title'],
         'type': play_meta['type']
     }
@@ -163,13 +164,13 @@ async def start_playlist(playlist_id, user):
             i+=1
 
     if bot_set.playlist_zip:
-        await edit_message(user['bot_msg'], lang.s.ZIPPING)
+        await edit_message(user.bot_msg, lang.s.ZIPPING)
         if playlist_sort:
             play_meta['folderpath'] = await move_sorted_playlist(play_meta, user)
         play_meta['folderpath'] = await zip_handler(play_meta['folderpath'])
 
     # if others not upload
     if not upload:
-        await edit_message(user['bot_msg'], lang.s.UPLOADING)
+        await edit_message(user.bot_msg, lang.s.UPLOADING)
         await playlist_upload(play_meta, user)
 
@@ -1,13 +1,18 @@
 import os
 import sys
 import asyncio
+import hashlib
 import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
 
 # Add helpers directory to sys.path for proper import resolution
 helpers_dir = os.path.dirname(os.path.abspath(__file__))
 if helpers_dir not in sys.path:
     sys.path.insert(0, helpers_dir)
 
+from aiolimiter import AsyncLimiter
 from pyrogram.types import Message
 from pyrogram.errors import MessageNotModified, FloodWait
 
@@ -15,36 +20,50 @@ from pyrogram.errors import MessageNotModified, FloodWait
 from bot import tgclient
 from bot.settings import bot_set
 from bot.logger import LOGGER
+from bot.helpers.database.pg_impl import upload_cache
 
 import bot.helpers.translations as lang
 
-current_user = []
-
-user_details = {
-    'user_id': None,
-    'name': None,
-    'user_name': None,
-    'r_id': None,
-    'chat_id': None,
-    'provider': None,
-    'bot_msg': None,
-    'link': None,
-    'override' : None
+current_user = set()
+
+# Message attribute holding the uploaded media for each send type
+media_attrs = {
+    'audio': 'audio',
+    'video': 'video',
+    'doc': 'document',
+    'pic': 'photo'
 }
 
+# Telegram bot limits: ~30 msg/s overall, 20 msg/min in groups, ~1 msg/s in private chats
+_global_limiter = AsyncLimiter(30, 1)
+# Per-chat limiters, least recently used chats dropped past CHAT_LIMITERS
+CHAT_LIMITERS = 4096
+_chat_limiters = OrderedDict()
+
+
+@dataclass(slots=True)
+class UserCtx:
+    """Details of the user and chat a request belongs to"""
+    user_id: int = 0
+    name: str = ''
+    user_name: str = ''
+    r_id: int = 0
+    chat_id: int = 0
+    provider: str | None = None
+    bot_msg: Any = None
+    link: str | None = None
+    override: Any = None
 
-async def fetch_user_details(msg: Message, reply=False) -> dict:
-    details = user_details.copy()
-    details['user_id'] = msg.from_user.id
-    details['name'] = msg.from_user.first_name
-    details['user_name'] = msg.from_user.username or msg.from_user.mention()
-    details['r_id'] = msg.reply_to_message.id if reply else msg.id
-    details['chat_id'] = msg.chat.id
-    try:
-        details['bot_msg'] = msg.id
-    except:
-        pass
-    return details
+
+def fetch_user_details(msg: Message, reply=False) -> UserCtx:
+    return UserCtx(
+        user_id=msg.from_user.id,
+        name=msg.from_user.first_name,
+        user_name=msg.from_user.username or msg.from_user.mention(),
+        r_id=msg.reply_to_message.id if reply else msg.id,
+        chat_id=msg.chat.id,
+        bot_msg=msg.id
+    )
 
 
 async def check_user(uid=None, msg=None, restricted=False) -> bool:
@@ -55,10 +74,9 @@ async def check_user(uid=None, msg=None, restricted=False) -> bool:
         if bot_set.bot_public:
             return True
         else:
-            all_chats = list(bot_set.admins) + bot_set.auth_chats + bot_set.auth_users 
-            if msg.from_user.id in all_chats:
+            if msg.from_user.id in bot_set.auth_set:
                 return True
-            elif msg.chat.id in all_chats:
+            elif msg.chat.id in bot_set.auth_set:
                 return True
     return False
 
@@ -67,110 +85,179 @@ async def antiSpam(uid=None, cid=None, revoke=False) -> bool:
     if revoke:
         if bot_set.anti_spam == 'CHAT+':
             if cid in current_user:
-                current_user.remove(cid)
+                current_user.discard(cid)
         elif bot_set.anti_spam == 'USER':
             if uid in current_user:
-                current_user.remove(uid)
+                current_user.discard(uid)
     else:
         if bot_set.anti_spam == 'CHAT+':
             if cid in current_user:
                 return True
             else:
-                current_user.append(cid)
+                current_user.add(cid)
         elif bot_set.anti_spam == 'USER':
             if uid in current_user:
                 return True
             else:
-                current_user.append(uid)
+                current_user.add(uid)
         return False
 
 
+def chat_limiter(chat_id) -> AsyncLimiter:
+    limiter = _chat_limiters.get(chat_id)
+    if limiter is None:
+        limiter = AsyncLimiter(20, 60) if chat_id < 0 else AsyncLimiter(1, 1)
+        _chat_limiters[chat_id] = limiter
+        if len(_chat_limiters) > CHAT_LIMITERS:
+            _chat_limiters.popitem(last=False)
+    else:
+        _chat_limiters.move_to_end(chat_id)
+    return limiter
+
+
+def media_cache_key(itype, meta) -> str:
+    """
+    Upload cache key for a provider item
+    Args:
+        itype: Send type (audio, video, ...)
+        meta: Item metadata, needs 'provider' and 'itemid'
+    Returns:
+        Key string, or None for ad-hoc files that must not be cached
+    """
+    if not meta or not meta.get('provider') or not meta.get('itemid'):
+        return None
+    # Quality and extension pick the actual file a provider item resolves to
+    parts = (meta['provider'], meta['itemid'], meta.get('quality', ''), meta.get('extension', ''), itype)
+    return hashlib.sha1(':'.join(map(str, parts)).encode()).hexdigest()
+
+
 async def send_message(user, item, itype='text', caption=None, markup=None, chat_id=None, meta=None):
-    if not isinstance(user, dict):
-        user = await fetch_user_details(user)
-    chat_id = chat_id if chat_id else user['chat_id']
-    
-    try:
-        if itype == 'text':
-            msg = await tgclient.aio.send_message(
-                chat_id=chat_id,
-                text=item,
-                reply_to_message_id=user['r_id'],
-                reply_markup=markup,
-                disable_web_page_preview=True
-            )
-        elif itype == 'doc':
-            msg = await tgclient.aio.send_document(
-                chat_id=chat_id,
-                document=item,
-                caption=caption,
-                reply_to_message_id=user['r_id']
-            )
-        elif itype == 'audio':
-            # SAFE METADATA ACCESS WITH DEFAULTS
-            duration = int(meta.get('duration', 0)) if meta else 0
-            artist = meta.get('artist', 'Unknown Artist') if meta else 'Unknown Artist'
-            title = meta.get('title', 'Unknown Track') if meta else 'Unknown Track'
-            thumbnail = meta.get('thumbnail') if meta else None
-            
-            msg = await tgclient.aio.send_audio(
-                chat_id=chat_id,
-                audio=item,
-                caption=caption,
-                duration=duration,
-                performer=artist,
-                title=title,
-                thumb=thumbnail,
-                reply_to_message_id=user['r_id']
-            )
-        elif itype == 'video':  # Added video type support
-            # SAFE METADATA ACCESS WITH DEFAULTS
-            duration = int(meta.get('duration', 0)) if meta else 0
-            width = int(meta.get('width', 1920)) if meta else 1920
-            height = int(meta.get('height', 1080)) if meta else 1080
-            thumbnail = meta.get('thumbnail') if meta else None
-            
-            msg = await tgclient.aio.send_video(
-                chat_id=chat_id,
-                video=item,
-                caption=caption,
-                duration=duration,
-                width=width,
-                height=height,
-                thumb=thumbnail,
-                reply_to_message_id=user['r_id']
-            )
-        elif itype == 'pic':
-            msg = await tgclient.aio.send_photo(
-                chat_id=chat_id,
-                photo=item,
-                caption=caption,
-                reply_to_message_id=user['r_id']
-            )
-    except FloodWait as e:
-        await asyncio.sleep(e.value)
-        return await send_message(user, item, itype, caption, markup, chat_id, meta)
-    except Exception as e:
-        LOGGER.error(f"Error sending message: {str(e)}")
+    if not isinstance(user, UserCtx):
+        user = fetch_user_details(user)
+    chat_id = chat_id if chat_id else user.chat_id
+
+    msg = None
+    path = item
+    cache_key = media_cache_key(itype, meta) if itype in media_attrs else None
+    if cache_key:
+        # Reuse the Telegram file_id of an identical earlier upload
+        item = await _cache_call(upload_cache.get_file_id, cache_key) or item
+
+    while True:
+        stale = False
+        async with _global_limiter, chat_limiter(chat_id):
+            try:
+                msg = await _send_item(user, item, itype, caption, markup, chat_id, meta)
+            except FloodWait as e:
+                await asyncio.sleep(e.value)
+                continue
+            except Exception as e:
+                if item is not path:
+                    # Cached file_id got rejected, upload the file again
+                    stale = True
+                    item = path
+                else:
+                    LOGGER.error(f"Error sending message: {str(e)}")
+        if stale:
+            await _cache_call(upload_cache.delete_file_id, cache_key)
+            continue
+        break
+
+    if cache_key and msg and item is path:
+        media = getattr(msg, media_attrs[itype], None)
+        if media:
+            await _cache_call(upload_cache.set_file_id, cache_key, media.file_id)
     
     return msg
 
 
-async def edit_message(msg:Message, text, markup=None, antiflood=True):
+async def _cache_call(func, *args):
+    """Run an upload cache query off the loop, a cache failure never fails the send"""
     try:
-        edited = await tgclient.aio.edit_message_text(
-            chat_id=msg.chat.id,
-            message_id=msg.id,
-            text=text,
+        return await asyncio.to_thread(func, *args)
+    except Exception as e:
+        LOGGER.warning(f"Upload cache unavailable: {str(e)}")
+        return None
+
+
+async def _send_item(user, item, itype, caption, markup, chat_id, meta):
+    if itype == 'text':
+        return await tgclient.aio.send_message(
+            chat_id=chat_id,
+            text=item,
+            reply_to_message_id=user.r_id,
             reply_markup=markup,
             disable_web_page_preview=True
         )
-        return edited
-    except MessageNotModified:
-        return None
-    except FloodWait as e:
-        if antiflood:
-            await asyncio.sleep(e.value)
-            return await edit_message(msg, text, markup, antiflood)
-        else:
+    elif itype == 'doc':
+        return await tgclient.aio.send_document(
+            chat_id=chat_id,
+            document=item,
+            caption=caption,
+            reply_to_message_id=user.r_id
+        )
+    elif itype == 'audio':
+        # SAFE METADATA ACCESS WITH DEFAULTS
+        duration = int(meta.get('duration', 0)) if meta else 0
+        artist = meta.get('artist', 'Unknown Artist') if meta else 'Unknown Artist'
+        title = meta.get('title', 'Unknown Track') if meta else 'Unknown Track'
+        thumbnail = meta.get('thumbnail') if meta else None
+        
+        return await tgclient.aio.send_audio(
+            chat_id=chat_id,
+            audio=item,
+            caption=caption,
+            duration=duration,
+            performer=artist,
+            title=title,
+            thumb=thumbnail,
+            reply_to_message_id=user.r_id
+        )
+    elif itype == 'video':  # Added video type support
+        # SAFE METADATA ACCESS WITH DEFAULTS
+        duration = int(meta.get('duration', 0)) if meta else 0
+        width = int(meta.get('width', 1920)) if meta else 1920
+        height = int(meta.get('height', 1080)) if meta else 1080
+        thumbnail = meta.get('thumbnail') if meta else None
+        
+        return await tgclient.aio.send_video(
+            chat_id=chat_id,
+            video=item,
+            caption=caption,
+            duration=duration,
+            width=width,
+            height=height,
+            thumb=thumbnail,
+            reply_to_message_id=user.r_id
+        )
+    elif itype == 'pic':
+        return await tgclient.aio.send_photo(
+            chat_id=chat_id,
+            photo=item,
+            caption=caption,
+            reply_to_message_id=user.r_id
+        )
+
+
+async def edit_message(msg:Message, text, markup=None, antiflood=True):
+    limiter = chat_limiter(msg.chat.id)
+    while True:
+        if not antiflood and not (_global_limiter.has_capacity() and limiter.has_capacity()):
+            # Drop non-essential edits instead of queueing them
             return None
+        async with _global_limiter, limiter:
+            try:
+                return await tgclient.aio.edit_message_text(
+                    chat_id=msg.chat.id,
+                    message_id=msg.id,
+                    text=text,
+                    reply_markup=markup,
+                    disable_web_page_preview=True
+                )
+            except MessageNotModified:
+                return None
+            except FloodWait as e:
+                if not antiflood:
+                    return None
+                wait = e.value
+        await asyncio.sleep(wait)
@@ -6,12 +6,13 @@ from pathvalidate import sanitize_filepath
 
 from ..utils import *
 from ..metadata import set_metadata
+from ..message import UserCtx
 
 # FIXED IMPORT: Changed from ..uploder to ..uploader
 from ..uploader import track_upload, album_upload, artist_upload, playlist_upload
 
 
-async def start_qobuz(url:str, user:dict):
+async def start_qobuz(url:str, user:UserCtx):
     items, item_id, type_dict, content = await check_type(url)
     if items:
         # FOR ARTIST
@@ -29,8 +30,8 @@ async def start_qobuz(url:str, user:dict):
             await start_track(item_id, user, None)
 
 
-async def start_album(item_id:int, user:dict, upload=True, basefolder=None):
-    album_meta, err = await get_album_metadata(item_id, user['r_id'])
+async def start_album(item_id:int, user:UserCtx, upload=True, basefolder=None):
+    album_meta, err = await get_album_metadata(item_id, user.r_id)
     if err:
         return await send_message(user, err)
     
@@ -46,7 +47,7 @@ async def start_album(item_id:int, user:dict, upload=True, basefolder=None):
     if basefolder:
         album_folder = basefolder + f"/{album_meta['title']}"
     else:
-        album_folder = f"{Config.DOWNLOAD_BASE_DIR}/{user['r_id']}/{album_meta['provider']}/{album_meta['artist']}/{album_meta['title']}"
+        album_folder = f"{Config.DOWNLOAD_BASE_DIR}/{user.r_id}/{album_meta['provider']}/{album_meta['artist']}/{album_meta['title']}"
     album_folder = sanitize_filepath(album_folder)
     album_meta['folderpath'] = album_folder
     
@@ -58,23 +59,23 @@ async def start_album(item_id:int, user:dict, upload=True, basefolder=None):
     
     update_details = {
         'text': lang.s.DOWNLOAD_PROGRESS,
-        'msg': user['bot_msg'],
+        'msg': user.bot_msg,
         'title': album_meta['title'],
         'type': album_meta['type']
     }
     await run_concurrent_tasks(tasks, update_details)
 
     if bot_set.album_zip:
-        await edit_message(user['bot_msg'], lang.s.ZIPPING)
+        await edit_message(user.bot_msg, lang.s.ZIPPING)
         album_meta['folderpath'] = await zip_handler(album_meta['folderpath'])
 
     # Upload
     if upload:
-        await edit_message(user['bot_msg'], lang.s.UPLOADING)
+        await edit_message(user.bot_msg, lang.s.UPLOADING)
         await album_upload(album_meta, user)
 
 
-async def start_track(item_id:int, user:dict, track_meta:dict | None, upload=True, basefolder=None, disable_link=False, disable_msg=False):
+async def start_track(item_id:int, user:UserCtx, track_meta:dict | None, upload=True, basefolder=None, disable_link=False, disable_msg=False):
     """
     Args:
         item_id: qobuz track id
@@ -89,14 +90,14 @@ async def start_track(item_id:int, user:dict, track_meta:dict | None, upload=Tru
     """
     
     if not track_meta:
-        track_meta, err = await get_track_metadata(item_id, user['r_id'])
+        track_meta, err = await get_track_metadata(item_id, user.r_id)
         if err:
             return await send_message(user, err)
-        filepath = f"{Config.DOWNLOAD_BASE_DIR}/{user['r_id']}/{track_meta['provider']}/{track_meta['albumartist']}/{track_meta['album']}"
+        filepath = f"{Config.DOWNLOAD_BASE_DIR}/{user.r_id}/{track_meta['provider']}/{track_meta['albumartist']}/{track_meta['album']}"
     else:
         # set base file path if doesnt exist in metadata
         if track_meta['filepath'] == '' and basefolder is None:
-            filepath = f"{Config.DOWNLOAD_BASE_DIR}/{user['r_id']}/{track_meta['provider']}/{track_meta['albumartist']}/{track_meta['album']}"
+            filepath = f"{Config.DOWNLOAD_BASE_DIR}/{user.r_id}/{track_meta['provider']}/{track_meta['albumartist']}/{track_meta['album']}"
         else:
             filepath = basefolder
         
@@ -109,7 +110,7 @@ async def start_track(item_id:int, user:dict, track_meta:dict | None, upload=Tru
     track_meta['extension'], track_meta['quality'] = await get_quality(raw_data)
 
     # add filename to filepath
-    filename = await format_string(Config.TRACK_NAME_FORMAT, track_meta, user)
+    filename = format_string(Config.TRACK_NAME_FORMAT, track_meta, user)
     filepath += f"/{filename}.{track_meta['extension']}"
     filepath = sanitize_filepath(filepath)
     track_meta['filepath'] = filepath
@@ -130,7 +131,7 @@ async def start_track(item_id:int, user:dict, track_meta:dict | None, upload=Tru
 
 async def start_artist(albums, user, artist):
     artist_meta = await get_artist_meta(artist[0])
-    artist_meta['folderpath'] = f"{Config.DOWNLOAD_BASE_DIR}/{user['r_id']}/Qobuz/{artist[0]['name']}"
+    artist_meta['folderpath'] = f"{Config.DOWNLOAD_BASE_DIR}/{user.r_id}/Qobuz/{artist[0]['name']}"
     artist_meta['folderpath'] = sanitize_filepath(artist_meta['folderpath'])
 
     upload_album = True
@@ -147,16 +148,16 @@ async def start_artist(albums, user, artist):
     # now upload artist folder as a whole
     if not upload_album:
         if bot_set.artist_zip:
-            await edit_message(user['bot_msg'], lang.s.ZIPPING)
+            await edit_message(user.bot_msg, lang.s.ZIPPING)
             artist_meta['folderpath'] = await zip_handler(artist_meta['folderpath'])
         
-        await edit_message(user['bot_msg'], lang.s.UPLOADING)
+        await edit_message(user.bot_msg, lang.s.UPLOADING)
         await artist_upload(artist_meta, user)
 
 
 
 async def start_playlist(tracks, playlist, user):
-    play_meta = await get_playlist_meta(playlist[0], tracks, user['r_id'])
+    play_meta = await get_playlist_meta(playlist[0], tracks, user.r_id)
     
     playlist_folder = None
 
@@ -164,7 +165,7 @@ async def start_playlist(tracks, playlist, user):
     playlist_sort = False if bot_set.upload_mode == 'Telegram' else bot_set.playlist_sort
     
     if not playlist_sort:
-        playlist_folder = f"{Config.DOWNLOAD_BASE_DIR}/{user['r_id']}/Qobuz/{play_meta['title']}"
+        playlist_folder = f"{Config.DOWNLOAD_BASE_DIR}/{user.r_id}/Qobuz/{play_meta['title']}"
         playlist_folder = sanitize_filepath(playlist_folder)
     play_meta['folderpath'] = playlist_folder
     
@@ -174,7 +175,7 @@ async def start_playlist(tracks, playlist, user):
 
     update_details = {
         'text': lang.s.DOWNLOAD_PROGRESS,
-        'msg': user['bot_msg'],
+        'msg': user.bot_msg,
         'title': play_meta['title'],
         'type': play_meta['type']
     }
@@ -197,11 +198,11 @@ async def start_playlist(tracks, playlist, user):
             i+=1
 
     if bot_set.playlist_zip:
-        await edit_message(user['bot_msg'], lang.s.ZIPPING)
+        await edit_message(user.bot_msg, lang.s.ZIPPING)
         if playlist_sort:
             play_meta['folderpath'] = await move_sorted_playlist(play_meta, user)
         play_meta['folderpath'] = await zip_handler(play_meta['folderpath'])
        
     if not upload:
-        await edit_message(user['bot_msg'], lang.s.UPLOADING)
+        await edit_message(user.bot_msg, lang.s.UPLOADING)
         await playlist_upload(play_meta, user)
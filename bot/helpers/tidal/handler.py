@@ -10,7 +10,7 @@ from .metadata import *
 from ..utils import *
 from ..metadata import set_metadata, get_audio_extension
 from ..uploader import *
-from ..message import send_message
+from ..message import send_message, UserCtx
 
 from ...settings import bot_set
 import bot.helpers.translations as lang
@@ -19,7 +19,7 @@ from bot.logger import LOGGER
 from config import Config
 
 
-async def start_tidal(url:str, user:dict):
+async def start_tidal(url:str, user:UserCtx):
     item_id, type_ = await parse_url(url)
 
     if type_ == 'track':
@@ -34,7 +34,7 @@ async def start_tidal(url:str, user:dict):
         await send_message(user, "Invalid Tidal URL")
         
 
-async def start_track(track_id:int, user:dict, track_meta:dict | None, \
+async def start_track(track_id:int, user:UserCtx, track_meta:dict | None, \
     upload=True, basefolder=None, session=None, quality=None, disable_link=False, disable_msg=False):
     if not track_meta:
         try:
@@ -42,8 +42,8 @@ async def start_track(track_id:int, user:dict, track_meta:dict | None, \
         except Exception as e:
             return await send_message(user, e)
 
-        track_meta = await get_track_metadata(track_id, track_data, user['r_id'])
-        filepath = f"{Config.DOWNLOAD_BASE_DIR}/{user['r_id']}/{track_meta['provider']}/{track_meta['albumartist']}/{track_meta['album']}"
+        track_meta = await get_track_metadata(track_id, track_data, user.r_id)
+        filepath = f"{Config.DOWNLOAD_BASE_DIR}/{user.r_id}/{track_meta['provider']}/{track_meta['albumartist']}/{track_meta['album']}"
         # mostly session and quality will not be present
         session, quality = await get_stream_session(track_data)
     else:
@@ -74,7 +74,7 @@ async def start_track(track_id:int, user:dict, track_meta:dict | None, \
 
         
         track_meta['folderpath'] = filepath
-        filename = await format_string(Config.TRACK_NAME_FORMAT, track_meta, user)
+        filename = format_string(Config.TRACK_NAME_FORMAT, track_meta, user)
         # not adding file extention now
         filepath += f"/{filename}"
         filepath = sanitize_filepath(filepath)
@@ -117,7 +117,7 @@ async def start_track(track_id:int, user:dict, track_meta:dict | None, \
 
         
 
-async def start_album(album_id:int, user:dict, upload=True, basefolder=None):
+async def start_album(album_id:int, user:UserCtx, upload=True, basefolder=None):
     try:
         album_data = await tidalapi.get_album(album_id)
     except Exception as e:
@@ -125,12 +125,12 @@ async def start_album(album_id:int, user:dict, upload=True, basefolder=None):
         
     tracks_data = await tidalapi.get_album_tracks(album_id)
     
-    album_meta = await get_album_metadata(album_id, album_data, tracks_data, user['r_id'])
+    album_meta = await get_album_metadata(album_id, album_data, tracks_data, user.r_id)
 
     if basefolder:
         album_folder = basefolder + f"/{album_meta['title']}"
     else:
-        album_folder = f"{Config.DOWNLOAD_BASE_DIR}/{user['r_id']}/{album_meta['provider']}/{album_meta['artist']}/{album_meta['title']}"
+        album_folder = f"{Config.DOWNLOAD_BASE_DIR}/{user.r_id}/{album_meta['provider']}/{album_meta['artist']}/{album_meta['title']}"
     
     album_folder = sanitize_filepath(album_folder)
     album_meta['folderpath'] = album_folder
@@ -153,27 +153,27 @@ async def start_album(album_id:int, user:dict, upload=True, basefolder=None):
 
     update_details = {
         'text': lang.s.DOWNLOAD_PROGRESS,
-        'msg': user['bot_msg'],
+        'msg': user.bot_msg,
         'title': album_meta['title'],
         'type': album_meta['type']
     }
     await run_concurrent_tasks(tasks, update_details)
 
     if bot_set.album_zip:
-        await edit_message(user['bot_msg'], lang.s.ZIPPING)
+        await edit_message(user.bot_msg, lang.s.ZIPPING)
         album_meta['folderpath'] = await zip_handler(album_meta['folderpath'])
 
     # Upload
     if upload:
-        await edit_message(user['bot_msg'], lang.s.UPLOADING)
+        await edit_message(user.bot_msg, lang.s.UPLOADING)
         await album_upload(album_meta, user)
 
 
 
-async def start_artist(artist_id:int, user:dict):
+async def start_artist(artist_id:int, user:UserCtx):
     artist_data = await tidalapi.get_artist(artist_id)
-    artist_meta = await get_artist_metadata(artist_data, user['r_id'])
-    artist_meta['folderpath'] = f"{Config.DOWNLOAD_BASE_DIR}/{user['r_id']}/{artist_meta['provider']}/{artist_meta['artist']}"
+    artist_meta = await get_artist_metadata(artist_data, user.r_id)
+    artist_meta['folderpath'] = f"{Config.DOWNLOAD_BASE_DIR}/{user.r_id}/{artist_meta['provider']}/{artist_meta['artist']}"
     artist_meta['folderpath'] = sanitize_filepath(artist_meta['folderpath'])
     
     try:
@@ -199,8 +199,8 @@ async def start_artist(artist_id:int, user:dict):
 
     if not upload_album:
         if bot_set.artist_zip:
-            await edit_message(user['bot_msg'], lang.s.ZIPPING)
+            await edit_message(user.bot_msg, lang.s.ZIPPING)
             artist_meta['folderpath'] = await zip_handler(artist_meta['folderpath'])
         
-        await edit_message(user['bot_msg'], lang.s.UPLOADING)
+        await edit_message(user.bot_msg, lang.s.UPLOADING)
         await artist_upload(artist_meta, user)
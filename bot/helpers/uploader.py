@@ -3,10 +3,24 @@ import shutil
 import zipfile
 import asyncio
 from config import Config
-from bot.helpers.utils import format_string, send_message, edit_message
+from bot.helpers.utils import send_message, edit_message, scan_files, zip_add_file, spawn
 from bot.logger import LOGGER
 import re
 
+_SANITIZE = re.compile(r'[^\w\s-]')
+
+# Static settings resolved once at import
+_UPLOAD_MODE = Config.UPLOAD_MODE
+_ALBUM_ZIP = Config.ALBUM_ZIP
+_ARTIST_ZIP = Config.ARTIST_ZIP
+_PLAYLIST_ZIP = Config.PLAYLIST_ZIP
+_RCLONE_DEST = Config.RCLONE_DEST
+_INDEX_LINK = Config.INDEX_LINK
+
+# Files waiting for removal after upload
+_CLEANUP_QUEUE = asyncio.Queue()
+_cleanup_task = None
+
 # Simple zip creation function to avoid circular imports
 async def create_simple_zip(folderpath, user_id, metadata):
     """
@@ -22,7 +36,7 @@ async def create_simple_zip(folderpath, user_id, metadata):
     content_type = metadata.get('type', 'content')
     provider = metadata.get('provider', 'AppleMusic')
     title = metadata.get('title', 'download')
-    safe_title = re.sub(r'[^\w\s-]', '', title)[:50]
+    safe_title = _SANITIZE.sub('', title)[:50]
     
     if content_type == 'album':
         zip_name = f"{provider}_{safe_title}_Album"
@@ -35,16 +49,57 @@ async def create_simple_zip(folderpath, user_id, metadata):
     
     zip_path = f"{folderpath}_{zip_name}.zip"
     
-    # Create the zip file
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for root, _, files in os.walk(folderpath):
-            for file in files:
-                file_path = os.path.join(root, file)
-                arcname = os.path.relpath(file_path, folderpath)
-                zipf.write(file_path, arcname)
+    # Create the zip file without blocking the event loop.
+    # Written to disk on purpose: Pyrogram seeks the source to size the upload,
+    # so it can't stream from a pipe, and BytesIO would hold the album in RAM.
+    await asyncio.to_thread(_write_zip, folderpath, zip_path)
     
     return zip_path
 
+def _write_zip(folderpath, zip_path):
+    """
+    Write folder contents into a zip, storing already compressed media as-is
+    Args:
+        folderpath: Path to folder
+        zip_path: Path of the zip to create
+    """
+    folderpath = folderpath.rstrip(os.sep)
+    base_len = len(folderpath) + 1
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1, allowZip64=True) as zipf:
+        for entry in scan_files(folderpath):
+            zip_add_file(zipf, entry.path, entry.path[base_len:], entry.stat())
+
+def _queue_removal(*paths):
+    """Hand files to the background cleaner instead of unlinking inline"""
+    global _cleanup_task
+    if _cleanup_task is None or _cleanup_task.done():
+        _cleanup_task = spawn(_cleaner())
+    for path in paths:
+        if path:
+            _CLEANUP_QUEUE.put_nowait(path)
+
+async def _cleaner():
+    """Drain the cleanup queue, unlinking each batch in one worker thread"""
+    while True:
+        paths = [await _CLEANUP_QUEUE.get()]
+        while not _CLEANUP_QUEUE.empty():
+            paths.append(_CLEANUP_QUEUE.get_nowait())
+        await asyncio.to_thread(_remove_files, paths)
+
+def _remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # Already removed with its parent folder
+        except OSError as e:
+            LOGGER.error(f"Failed to remove {path}: {str(e)}")
+
+def _base_path(path, user):
+    """Base directory that upload paths are relative to"""
+    apple_dir = os.path.join(Config.LOCAL_STORAGE, str(user.user_id), "Apple Music")
+    return apple_dir if path.startswith(apple_dir + os.sep) else Config.LOCAL_STORAGE
+
 async def track_upload(metadata, user):
     """
     Upload a single track
@@ -53,50 +108,35 @@ async def track_upload(metadata, user):
         user: User details
     """
     # Determine base path for different providers
-    if "Apple Music" in metadata['filepath']:
-        base_path = os.path.join(Config.LOCAL_STORAGE, "Apple Music")
-    else:
-        base_path = Config.LOCAL_STORAGE
+    base_path = _base_path(metadata['filepath'], user)
     
-    if Config.UPLOAD_MODE == 'Telegram':
+    if _UPLOAD_MODE == 'Telegram':
         await send_message(
             user,
             metadata['filepath'],
             'audio',
-            caption=await format_string(
-                "🎵 **{title}**\n👤 {artist}\n🎧 {provider}",
-                {
-                    'title': metadata['title'],
-                    'artist': metadata['artist'],
-                    'provider': metadata.get('provider', 'Apple Music')
-                }
-            ),
+            caption=f"🎵 **{metadata['title']}**\n👤 {metadata['artist']}\n🎧 {metadata.get('provider', 'Apple Music').title()}",
             meta={
                 'duration': metadata['duration'],
                 'artist': metadata['artist'],
                 'title': metadata['title'],
-                'thumbnail': metadata['thumbnail']
+                'thumbnail': metadata['thumbnail'],
+                # Upload cache key
+                'provider': metadata.get('provider'),
+                'itemid': metadata.get('itemid'),
+                'quality': metadata.get('quality', ''),
+                'extension': metadata.get('extension', '')
             }
         )
-    elif Config.UPLOAD_MODE == 'Rclone':
+    elif _UPLOAD_MODE == 'Rclone':
         rclone_link, index_link = await rclone_upload(user, metadata['filepath'], base_path)
-        text = await format_string(
-            "🎵 **{title}**\n👤 {artist}\n🎧 {provider}\n🔗 [Direct Link]({r_link})",
-            {
-                'title': metadata['title'],
-                'artist': metadata['artist'],
-                'provider': metadata.get('provider', 'Apple Music'),
-                'r_link': rclone_link
-            }
-        )
+        text = f"🎵 **{metadata['title']}**\n👤 {metadata['artist']}\n🎧 {metadata.get('provider', 'Apple Music').title()}\n🔗 [Direct Link]({rclone_link})"
         if index_link:
             text += f"\n📁 [Index Link]({index_link})"
         await send_message(user, text)
     
     # Cleanup
-    os.remove(metadata['filepath'])
-    if metadata.get('thumbnail'):
-        os.remove(metadata['thumbnail'])
+    _queue_removal(metadata['filepath'], metadata.get('thumbnail'))
 
 async def music_video_upload(metadata, user):
     """
@@ -106,46 +146,26 @@ async def music_video_upload(metadata, user):
         user: User details
     """
     # Determine base path for different providers
-    if "Apple Music" in metadata['filepath']:
-        base_path = os.path.join(Config.LOCAL_STORAGE, "Apple Music")
-    else:
-        base_path = Config.LOCAL_STORAGE
+    base_path = _base_path(metadata['filepath'], user)
     
-    if Config.UPLOAD_MODE == 'Telegram':
+    if _UPLOAD_MODE == 'Telegram':
         # FIX: Pass the entire metadata object as meta parameter
         await send_message(
             user,
             metadata['filepath'],
             'video',
-            caption=await format_string(
-                "🎬 **{title}**\n👤 {artist}\n🎧 {provider} Music Video",
-                {
-                    'title': metadata['title'],
-                    'artist': metadata['artist'],
-                    'provider': metadata.get('provider', 'Apple Music')
-                }
-            ),
+            caption=f"🎬 **{metadata['title']}**\n👤 {metadata['artist']}\n🎧 {metadata.get('provider', 'Apple Music').title()} Music Video",
             meta=metadata  # PASS METADATA HERE
         )
-    elif Config.UPLOAD_MODE == 'Rclone':
+    elif _UPLOAD_MODE == 'Rclone':
         rclone_link, index_link = await rclone_upload(user, metadata['filepath'], base_path)
-        text = await format_string(
-            "🎬 **{title}**\n👤 {artist}\n🎧 {provider} Music Video\n🔗 [Direct Link]({r_link})",
-            {
-                'title': metadata['title'],
-                'artist': metadata['artist'],
-                'provider': metadata.get('provider', 'Apple Music'),
-                'r_link': rclone_link
-            }
-        )
+        text = f"🎬 **{metadata['title']}**\n👤 {metadata['artist']}\n🎧 {metadata.get('provider', 'Apple Music').title()} Music Video\n🔗 [Direct Link]({rclone_link})"
         if index_link:
             text += f"\n📁 [Index Link]({index_link})"
         await send_message(user, text)
     
     # Cleanup
-    os.remove(metadata['filepath'])
-    if metadata.get('thumbnail'):
-        os.remove(metadata['thumbnail'])
+    _queue_removal(metadata['filepath'], metadata.get('thumbnail'))
 
 async def album_upload(metadata, user):
     """
@@ -155,29 +175,19 @@ async def album_upload(metadata, user):
         user: User details
     """
     # Determine base path for different providers
-    if "Apple Music" in metadata['folderpath']:
-        base_path = os.path.join(Config.LOCAL_STORAGE, "Apple Music")
-    else:
-        base_path = Config.LOCAL_STORAGE
+    base_path = _base_path(metadata['folderpath'], user)
     
-    if Config.UPLOAD_MODE == 'Telegram':
-        if Config.ALBUM_ZIP:
+    if _UPLOAD_MODE == 'Telegram':
+        if _ALBUM_ZIP:
             # Create descriptive zip file
             zip_path = await create_simple_zip(
                 metadata['folderpath'], 
-                user['user_id'],
+                user.user_id,
                 metadata
             )
             
             # Create caption with provider info
-            caption = await format_string(
-                "💿 **{album}**\n👤 {artist}\n🎧 {provider}",
-                {
-                    'album': metadata['title'],
-                    'artist': metadata['artist'],
-                    'provider': metadata.get('provider', 'Apple Music')
-                }
-            )
+            caption = f"💿 **{metadata['title']}**\n👤 {metadata['artist']}\n🎧 {metadata.get('provider', 'Apple Music').title()}"
             
             await send_message(
                 user,
@@ -187,22 +197,14 @@ async def album_upload(metadata, user):
             )
             
             # Clean up zip file after upload
-            os.remove(zip_path)
+            await asyncio.to_thread(os.remove, zip_path)
         else:
-            # Upload tracks individually
+            # Upload tracks individually, in track order
             for track in metadata['tracks']:
                 await track_upload(track, user)
-    elif Config.UPLOAD_MODE == 'Rclone':
+    elif _UPLOAD_MODE == 'Rclone':
         rclone_link, index_link = await rclone_upload(user, metadata['folderpath'], base_path)
-        text = await format_string(
-            "💿 **{album}**\n👤 {artist}\n🎧 {provider}\n🔗 [Direct Link]({r_link})",
-            {
-                'album': metadata['title'],
-                'artist': metadata['artist'],
-                'provider': metadata.get('provider', 'Apple Music'),
-                'r_link': rclone_link
-            }
-        )
+        text = f"💿 **{metadata['title']}**\n👤 {metadata['artist']}\n🎧 {metadata.get('provider', 'Apple Music').title()}\n🔗 [Direct Link]({rclone_link})"
         if index_link:
             text += f"\n📁 [Index Link]({index_link})"
         
@@ -212,7 +214,7 @@ async def album_upload(metadata, user):
             await send_message(user, text)
     
     # Cleanup
-    shutil.rmtree(metadata['folderpath'])
+    await asyncio.to_thread(shutil.rmtree, metadata['folderpath'])
 
 async def artist_upload(metadata, user):
     """
@@ -222,28 +224,19 @@ async def artist_upload(metadata, user):
         user: User details
     """
     # Determine base path for different providers
-    if "Apple Music" in metadata['folderpath']:
-        base_path = os.path.join(Config.LOCAL_STORAGE, "Apple Music")
-    else:
-        base_path = Config.LOCAL_STORAGE
+    base_path = _base_path(metadata['folderpath'], user)
     
-    if Config.UPLOAD_MODE == 'Telegram':
-        if Config.ARTIST_ZIP:
+    if _UPLOAD_MODE == 'Telegram':
+        if _ARTIST_ZIP:
             # Create descriptive zip file
             zip_path = await create_simple_zip(
                 metadata['folderpath'], 
-                user['user_id'],
+                user.user_id,
                 metadata
             )
             
             # Create caption with provider info
-            caption = await format_string(
-                "🎤 **{artist}**\n🎧 {provider} Discography",
-                {
-                    'artist': metadata['title'],
-                    'provider': metadata.get('provider', 'Apple Music')
-                }
-            )
+            caption = f"🎤 **{metadata['title']}**\n🎧 {metadata.get('provider', 'Apple Music').title()} Discography"
             
             await send_message(
                 user,
@@ -253,27 +246,20 @@ async def artist_upload(metadata, user):
             )
             
             # Clean up zip file after upload
-            os.remove(zip_path)
+            await asyncio.to_thread(os.remove, zip_path)
         else:
-            # Upload albums individually
+            # Upload albums one at a time so only one album zip is on disk at once
             for album in metadata['albums']:
                 await album_upload(album, user)
-    elif Config.UPLOAD_MODE == 'Rclone':
+    elif _UPLOAD_MODE == 'Rclone':
         rclone_link, index_link = await rclone_upload(user, metadata['folderpath'], base_path)
-        text = await format_string(
-            "🎤 **{artist}**\n🎧 {provider} Discography\n🔗 [Direct Link]({r_link})",
-            {
-                'artist': metadata['title'],
-                'provider': metadata.get('provider', 'Apple Music'),
-                'r_link': rclone_link
-            }
-        )
+        text = f"🎤 **{metadata['title']}**\n🎧 {metadata.get('provider', 'Apple Music').title()} Discography\n🔗 [Direct Link]({rclone_link})"
         if index_link:
             text += f"\n📁 [Index Link]({index_link})"
         await send_message(user, text)
     
     # Cleanup
-    shutil.rmtree(metadata['folderpath'])
+    await asyncio.to_thread(shutil.rmtree, metadata['folderpath'])
 
 async def playlist_upload(metadata, user):
     """
@@ -283,29 +269,19 @@ async def playlist_upload(metadata, user):
         user: User details
     """
     # Determine base path for different providers
-    if "Apple Music" in metadata['folderpath']:
-        base_path = os.path.join(Config.LOCAL_STORAGE, "Apple Music")
-    else:
-        base_path = Config.LOCAL_STORAGE
+    base_path = _base_path(metadata['folderpath'], user)
     
-    if Config.UPLOAD_MODE == 'Telegram':
-        if Config.PLAYLIST_ZIP:
+    if _UPLOAD_MODE == 'Telegram':
+        if _PLAYLIST_ZIP:
             # Create descriptive zip file
             zip_path = await create_simple_zip(
                 metadata['folderpath'], 
-                user['user_id'],
+                user.user_id,
                 metadata
             )
             
             # Create caption with provider info
-            caption = await format_string(
-                "🎵 **{title}**\n👤 Curated by {artist}\n🎧 {provider} Playlist",
-                {
-                    'title': metadata['title'],
-                    'artist': metadata.get('artist', 'Various Artists'),
-                    'provider': metadata.get('provider', 'Apple Music')
-                }
-            )
+            caption = f"🎵 **{metadata['title']}**\n👤 Curated by {metadata.get('artist', 'Various Artists')}\n🎧 {metadata.get('provider', 'Apple Music').title()} Playlist"
             
             await send_message(
                 user,
@@ -315,28 +291,20 @@ async def playlist_upload(metadata, user):
             )
             
             # Clean up zip file after upload
-            os.remove(zip_path)
+            await asyncio.to_thread(os.remove, zip_path)
         else:
-            # Upload tracks individually
+            # Upload tracks individually, in track order
             for track in metadata['tracks']:
                 await track_upload(track, user)
-    elif Config.UPLOAD_MODE == 'Rclone':
+    elif _UPLOAD_MODE == 'Rclone':
         rclone_link, index_link = await rclone_upload(user, metadata['folderpath'], base_path)
-        text = await format_string(
-            "🎵 **{title}**\n👤 Curated by {artist}\n🎧 {provider} Playlist\n🔗 [Direct Link]({r_link})",
-            {
-                'title': metadata['title'],
-                'artist': metadata.get('artist', 'Various Artists'),
-                'provider': metadata.get('provider', 'Apple Music'),
-                'r_link': rclone_link
-            }
-        )
+        text = f"🎵 **{metadata['title']}**\n👤 Curated by {metadata.get('artist', 'Various Artists')}\n🎧 {metadata.get('provider', 'Apple Music').title()} Playlist\n🔗 [Direct Link]({rclone_link})"
         if index_link:
             text += f"\n📁 [Index Link]({index_link})"
         await send_message(user, text)
     
     # Cleanup
-    shutil.rmtree(metadata['folderpath'])
+    await asyncio.to_thread(shutil.rmtree, metadata['folderpath'])
 
 async def rclone_upload(user, path, base_path):
     """
@@ -349,19 +317,18 @@ async def rclone_upload(user, path, base_path):
         rclone_link, index_link
     """
     # Skip if not configured
-    if not Config.RCLONE_DEST:
+    if not _RCLONE_DEST:
         return None, None
     
     # Get relative path
-    relative_path = str(path).replace(base_path, "").lstrip('/')
+    relative_path = os.path.relpath(path, base_path)
     
     rclone_link = None
     index_link = None
 
     if bot_set.link_options in ['RCLONE', 'Both']:
-        cmd = f'rclone link --config ./rclone.conf "{Config.RCLONE_DEST}/{relative_path}"'
-        task = await asyncio.create_subprocess_shell(
-            cmd,
+        task = await asyncio.create_subprocess_exec(
+            'rclone', 'link', '--config', './rclone.conf', f"{_RCLONE_DEST}/{relative_path}",
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE
         )
@@ -375,7 +342,7 @@ async def rclone_upload(user, path, base_path):
             LOGGER.debug(f"Failed to get Rclone link: {error_message}")
     
     if bot_set.link_options in ['Index', 'Both']:
-        if Config.INDEX_LINK:
-            index_link = f"{Config.INDEX_LINK}/{relative_path}"
+        if _INDEX_LINK:
+            index_link = f"{_INDEX_LINK}/{relative_path}"
     
     return rclone_link, index_link
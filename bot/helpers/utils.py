@@ -1,13 +1,15 @@
 import os
-import math
+import functools
 import aiohttp
+import aiofiles
 import asyncio
 import shutil
 import zipfile
 import re
 import json
 import base64
-import requests
+import time
+import weakref
 from pathlib import Path
 from urllib.parse import quote
 from aiohttp import ClientTimeout
@@ -23,10 +25,88 @@ from ..settings import bot_set
 from .buttons.links import links_button
 
 # FIXED: Use absolute imports for message functions
-from .message import send_message, edit_message
+from .message import send_message, edit_message, UserCtx
 
 MAX_SIZE = 1.9 * 1024 * 1024 * 1024  # 2GB
 
+COPY_BUFFER = 1 << 20  # 1 MiB
+DOWNLOAD_CHUNK = 1 << 17  # 128 KiB
+
+# Already compressed media is stored as-is in zips, deflate gains nothing on it
+STORED_EXTENSIONS = {
+    '.flac', '.m4a', '.alac', '.aac', '.mp3', '.opus', '.ogg',
+    '.mp4', '.mkv', '.jpg', '.jpeg', '.png', '.webp'
+}
+
+# Shared HTTP session so repeated fetches reuse pooled connections
+http_session = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """
+    Get the shared aiohttp session, creating it on first use
+    Returns:
+        aiohttp.ClientSession
+    """
+    global http_session
+    if http_session is None or http_session.closed:
+        http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=Config.MAX_WORKERS * 2,
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            )
+        )
+    return http_session
+
+
+async def close_session():
+    """Close the shared aiohttp session if it was opened"""
+    if http_session and not http_session.closed:
+        await http_session.close()
+
+
+# Background tasks started by the bot itself, cancelled first on shutdown
+_BG_TASKS: "weakref.WeakSet[asyncio.Task]" = weakref.WeakSet()
+
+
+def spawn(coro) -> asyncio.Task:
+    """
+    Start a background task and track it for shutdown
+    Args:
+        coro: Coroutine to run
+    Returns:
+        asyncio.Task
+    """
+    task = asyncio.create_task(coro)
+    _BG_TASKS.add(task)
+    return task
+
+
+async def cancel_background_tasks():
+    """Cancel tracked background tasks and wait for them to finish"""
+    tasks = list(_BG_TASKS)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+def write_bytes(path, data):
+    """
+    Write bytes to a file with raw os calls, skipping the buffered file object
+    Args:
+        path: File to create or truncate
+        data: Bytes-like content
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        # os.write may write less than asked, loop until everything is out
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
 async def download_file(url, path, retries=3, timeout=30):
     """
     Download a file with retry logic and timeout
@@ -42,15 +122,15 @@ async def download_file(url, path, retries=3, timeout=30):
     
     for attempt in range(1, retries + 1):
         try:
-            async with aiohttp.ClientSession(timeout=ClientTimeout(total=timeout)) as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        with open(path, 'wb') as f:
-                            async for chunk in response.content.iter_chunked(1024 * 4):
-                                f.write(chunk)
-                        return None
-                    else:
-                        return f"HTTP Status: {response.status}"
+            session = get_session()
+            async with session.get(url, timeout=ClientTimeout(total=timeout)) as response:
+                if response.status == 200:
+                    async with aiofiles.open(path, 'wb', buffering=COPY_BUFFER) as f:
+                        async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK):
+                            await f.write(chunk)
+                    return None
+                else:
+                    return f"HTTP Status: {response.status}"
         except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             if attempt == retries:
                 return f"Failed after {retries} attempts: {str(e)}"
@@ -59,7 +139,41 @@ async def download_file(url, path, retries=3, timeout=30):
             return f"Unexpected error: {str(e)}"
 
 
-async def format_string(text:str, data:dict, user=None):
+# Placeholder -> value getter used by format_string
+_PLACEHOLDERS = {
+    'title': lambda d: d.get('title', ''),
+    'album': lambda d: d.get('album', ''),
+    'artist': lambda d: d.get('artist', ''),
+    'albumartist': lambda d: d.get('albumartist', ''),
+    'tracknumber': lambda d: str(d.get('tracknumber', '')),
+    'date': lambda d: str(d.get('date', '')),
+    'upc': lambda d: str(d.get('upc', '')),
+    'isrc': lambda d: str(d.get('isrc', '')),
+    'totaltracks': lambda d: str(d.get('totaltracks', '')),
+    'volume': lambda d: str(d.get('volume', '')),
+    'totalvolume': lambda d: str(d.get('totalvolume', '')),
+    'extension': lambda d: d.get('extension', ''),
+    'duration': lambda d: str(d.get('duration', '')),
+    'copyright': lambda d: d.get('copyright', ''),
+    'genre': lambda d: d.get('genre', ''),
+    'provider': lambda d: d.get('provider', '').title(),
+    'quality': lambda d: d.get('quality', ''),
+    'explicit': lambda d: str(d.get('explicit', '')),
+}
+_USER_PLACEHOLDERS = {
+    'user': lambda u: u.name,
+    'username': lambda u: u.user_name,
+}
+_PLACEHOLDER_RE = re.compile(r'\{(\w+)\}')
+
+
+@functools.lru_cache(maxsize=64)
+def _parse_template(text: str) -> tuple:
+    """Split a template into alternating literal text and placeholder names"""
+    return tuple(_PLACEHOLDER_RE.split(text))
+
+
+def format_string(text:str, data:dict, user=None):
     """
     Format text using metadata placeholders
     Args:
@@ -69,35 +183,18 @@ async def format_string(text:str, data:dict, user=None):
     Returns:
         Formatted string
     """
-    replacements = {
-        '{title}': data.get('title', ''),
-        '{album}': data.get('album', ''),
-        '{artist}': data.get('artist', ''),
-        '{albumartist}': data.get('albumartist', ''),
-        '{tracknumber}': str(data.get('tracknumber', '')),
-        '{date}': str(data.get('date', '')),
-        '{upc}': str(data.get('upc', '')),
-        '{isrc}': str(data.get('isrc', '')),
-        '{totaltracks}': str(data.get('totaltracks', '')),
-        '{volume}': str(data.get('volume', '')),
-        '{totalvolume}': str(data.get('totalvolume', '')),
-        '{extension}': data.get('extension', ''),
-        '{duration}': str(data.get('duration', '')),
-        '{copyright}': data.get('copyright', ''),
-        '{genre}': data.get('genre', ''),
-        '{provider}': data.get('provider', '').title(),
-        '{quality}': data.get('quality', ''),
-        '{explicit}': str(data.get('explicit', '')),
-    }
-    
-    if user:
-        replacements['{user}'] = user.get('name', '')
-        replacements['{username}'] = user.get('user_name', '')
-    
-    for key, value in replacements.items():
-        text = text.replace(key, value)
-        
-    return text
+    parts = _parse_template(text)
+    out = [parts[0]]
+    for i in range(1, len(parts), 2):
+        key = parts[i]
+        if key in _PLACEHOLDERS:
+            out.append(_PLACEHOLDERS[key](data))
+        elif user and key in _USER_PLACEHOLDERS:
+            out.append(_USER_PLACEHOLDERS[key](user))
+        else:
+            out.append('{' + key + '}')
+        out.append(parts[i + 1])
+    return ''.join(out)
 
 
 async def run_concurrent_tasks(tasks, progress_details=None):
@@ -109,24 +206,34 @@ async def run_concurrent_tasks(tasks, progress_details=None):
     Returns:
         Results of all tasks
     """
-    semaphore = asyncio.Semaphore(Config.MAX_WORKERS)
+    max_workers = Config.MAX_WORKERS
+    semaphore = asyncio.Semaphore(max_workers)
     completed = 0
     total = len(tasks)
+    # Coalesce progress edits: only on a new percentage, at most every 2s,
+    # and never while another edit is still in flight
+    edit_lock = asyncio.Lock()
+    last_percent = -1
+    last_ts = 0.0
     
     async def run_task(task):
-        nonlocal completed
+        nonlocal completed, last_percent, last_ts
         async with semaphore:
             result = await task
             completed += 1
-            if progress_details:
-                progress = int((completed / total) * 100)
-                try:
-                    await edit_message(
-                        progress_details['msg'],
-                        f"{progress_details['text']}\nProgress: {progress}%"
-                    )
-                except FloodWait:
-                    pass
+            if progress_details and not edit_lock.locked():
+                progress = completed * 100 // total
+                now = asyncio.get_running_loop().time()
+                if progress != last_percent and now - last_ts >= 2:
+                    async with edit_lock:
+                        last_percent, last_ts = progress, now
+                        try:
+                            await edit_message(
+                                progress_details['msg'],
+                                f"{progress_details['text']}\nProgress: {progress}%"
+                            )
+                        except FloodWait:
+                            pass
             return result
             
     return await asyncio.gather(*(run_task(task) for task in tasks))
@@ -142,14 +249,14 @@ async def create_link(path, basepath):
         rclone_link, index_link
     """
     path = str(Path(path).relative_to(basepath))
+    link_opts = bot_set.link_options
 
     rclone_link = None
     index_link = None
 
-    if bot_set.link_options in ['RCLONE', 'Both']:
-        cmd = f'rclone link --config ./rclone.conf "{Config.RCLONE_DEST}/{path}"'
-        task = await asyncio.create_subprocess_shell(
-            cmd,
+    if link_opts in ['RCLONE', 'Both']:
+        task = await asyncio.create_subprocess_exec(
+            'rclone', 'link', '--config', './rclone.conf', f"{Config.RCLONE_DEST}/{path}",
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE
         )
@@ -162,9 +269,10 @@ async def create_link(path, basepath):
             error_message = stderr.decode().strip()
             LOGGER.debug(f"Failed to get link: {error_message}")
             
-    if bot_set.link_options in ['Index', 'Both']:
-        if Config.INDEX_LINK:
-            index_link =  Config.INDEX_LINK + '/' + quote(path)
+    if link_opts in ['Index', 'Both']:
+        base_index = Config.INDEX_LINK
+        if base_index:
+            index_link =  base_index + '/' + quote(path)
 
     return rclone_link, index_link
 
@@ -177,13 +285,78 @@ async def zip_handler(folderpath):
     Returns:
         List of zip paths
     """
-    loop = asyncio.get_running_loop()
-    with ThreadPoolExecutor() as pool:
-        if bot_set.upload_mode == 'Telegram':
-            zips = await loop.run_in_executor(pool, split_zip_folder, folderpath)
-        else:
-            zips = await loop.run_in_executor(pool, zip_folder, folderpath)
-        return zips
+    zipper = split_zip_folder if bot_set.upload_mode == 'Telegram' else zip_folder
+    return await asyncio.to_thread(zipper, folderpath)
+
+
+def scan_files(directory):
+    """
+    Recursively yield the files under a folder
+    Args:
+        directory: Path to folder
+    Yields:
+        os.DirEntry of each file (stat results are cached on the entry)
+    """
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from scan_files(entry.path)
+            else:
+                yield entry
+
+
+def zip_compress_type(path) -> int:
+    """
+    Pick zip compression for a file
+    Args:
+        path: File path
+    Returns:
+        ZIP_STORED for already compressed media, else ZIP_DEFLATED
+    """
+    if os.path.splitext(path)[1].lower() in STORED_EXTENSIONS:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def zip_add_file(zipf, file_path, arcname, st=None):
+    """
+    Add a file to an open zip, copying stored media in 1 MiB blocks
+    Args:
+        zipf: ZipFile opened for writing
+        file_path: File to add
+        arcname: Name inside the archive
+        st: os.stat_result already at hand (e.g. from a DirEntry), skips a stat
+    """
+    compress_type = zip_compress_type(file_path)
+    if compress_type != zipfile.ZIP_STORED:
+        # Let ZipFile.write apply the archive's compresslevel
+        zipf.write(file_path, arcname, compress_type=compress_type)
+        return
+    if st is None:
+        zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+    else:
+        zinfo = zip_info_from_stat(arcname, st)
+    zinfo.compress_type = compress_type
+    with open(file_path, 'rb', buffering=0) as src, zipf.open(zinfo, 'w') as dst:
+        shutil.copyfileobj(src, dst, COPY_BUFFER)
+
+
+def zip_info_from_stat(arcname, st) -> zipfile.ZipInfo:
+    """
+    Build a ZipInfo like ZipInfo.from_file does, without stat-ing again
+    Args:
+        arcname: Name inside the archive
+        st: os.stat_result of the file
+    Returns:
+        zipfile.ZipInfo
+    """
+    date_time = time.localtime(st.st_mtime)[:6]
+    if date_time[0] < 1980:
+        date_time = (1980, 1, 1, 0, 0, 0)  # zip can't store earlier dates
+    zinfo = zipfile.ZipInfo(arcname, date_time)
+    zinfo.external_attr = (st.st_mode & 0xFFFF) << 16
+    zinfo.file_size = st.st_size
+    return zinfo
 
 
 def split_zip_folder(folderpath) -> list:
@@ -194,46 +367,68 @@ def split_zip_folder(folderpath) -> list:
     Returns:
         List of zip file paths
     """
-    zip_paths = []
-    part_num = 1
+    buckets = plan_zip_parts(folderpath)
+    zip_paths = [
+        f"{folderpath}.zip" if part_num == 1 else f"{folderpath}.part{part_num}.zip"
+        for part_num in range(1, len(buckets) + 1)
+    ]
+    if not buckets:
+        return zip_paths
+
+    # Parts are independent; zlib and file I/O release the GIL so threads run them in parallel
+    with ThreadPoolExecutor(max_workers=min(len(buckets), os.cpu_count() or 1)) as pool:
+        list(pool.map(write_zip_part, zip_paths, buckets))
+
+    return zip_paths
+
+
+def plan_zip_parts(folderpath) -> list:
+    """
+    Group files of a folder into parts that stay under MAX_SIZE
+    Args:
+        folderpath: Path to folder
+    Returns:
+        List of parts, each a list of (file_path, arcname, stat_result)
+    """
+    buckets = []
     current_size = 0
     current_files = []
+    base_len = len(folderpath.rstrip(os.sep)) + 1
+
+    for entry in scan_files(folderpath):
+        st = entry.stat()
+        file_size = st.st_size
+
+        # Start new part if adding would exceed max size
+        if current_files and current_size + file_size > MAX_SIZE:
+            buckets.append(current_files)
+            current_files = []
+            current_size = 0
+
+        # Add to current group
+        current_files.append((entry.path, entry.path[base_len:], st))
+        current_size += file_size
 
-    def add_to_zip(zip_name, files_to_add):
-        nonlocal part_num
-        if part_num == 1:
-            zip_path = f"{zip_name}.zip"
-        else:
-            zip_path = f"{zip_name}.part{part_num}.zip"
-
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for file_path, arcname in files_to_add:
-                zipf.write(file_path, arcname)
-                os.remove(file_path)  # Delete after zipping
-        return zip_path
-
-    for root, dirs, files in os.walk(folderpath):
-        for file in files:
-            file_path = os.path.join(root, file)
-            file_size = os.path.getsize(file_path)
-            arcname = os.path.relpath(file_path, folderpath)
-
-            # Start new zip if adding would exceed max size
-            if current_size + file_size > MAX_SIZE:
-                zip_paths.append(add_to_zip(folderpath, current_files))
-                part_num += 1
-                current_files = []
-                current_size = 0
-
-            # Add to current group
-            current_files.append((file_path, arcname))
-            current_size += file_size
-
-    # Create final zip with remaining files
     if current_files:
-        zip_paths.append(add_to_zip(folderpath, current_files))
+        buckets.append(current_files)
 
-    return zip_paths
+    return buckets
+
+
+def write_zip_part(zip_path, files_to_add) -> str:
+    """
+    Write one zip part, deleting source files once added
+    Args:
+        zip_path: Path of the zip to create
+        files_to_add: List of (file_path, arcname, stat_result)
+    Returns:
+        Path to zip file
+    """
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zipf:
+        for file_path, arcname, st in files_to_add:
+            zip_add_file(zipf, file_path, arcname, st)
+            os.remove(file_path)  # Delete after zipping
+    return zip_path
 
 
 def zip_folder(folderpath) -> str:
@@ -246,12 +441,12 @@ def zip_folder(folderpath) -> str:
     """
     zip_path = f"{folderpath}.zip"
     
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for root, dirs, files in os.walk(folderpath):
-            for file in files:
-                file_path = os.path.join(root, file)
-                zipf.write(file_path, os.path.relpath(file_path, folderpath))
-                os.remove(file_path)
+    base_len = len(folderpath.rstrip(os.sep)) + 1
+    
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zipf:
+        for entry in scan_files(folderpath):
+            zip_add_file(zipf, entry.path, entry.path[base_len:], entry.stat())
+            os.remove(entry.path)
     
     return zip_path
 
@@ -265,24 +460,25 @@ async def move_sorted_playlist(metadata, user) -> str:
     Returns:
         Path to playlist folder
     """
-    source_folder = f"{Config.DOWNLOAD_BASE_DIR}/{user['r_id']}/{metadata['provider']}"
-    destination_folder = f"{Config.DOWNLOAD_BASE_DIR}/{user['r_id']}/{metadata['provider']}/{metadata['title']}"
+    source_folder = f"{Config.DOWNLOAD_BASE_DIR}/{user.r_id}/{metadata['provider']}"
+    destination_folder = f"{Config.DOWNLOAD_BASE_DIR}/{user.r_id}/{metadata['provider']}/{metadata['title']}"
 
     os.makedirs(destination_folder, exist_ok=True)
 
-    # Move all artist/album folders
-    folders = [
-        os.path.join(source_folder, name) for name in os.listdir(source_folder) 
-        if os.path.isdir(os.path.join(source_folder, name))
-    ]
+    # Move all artist/album folders (same parent, so a rename is enough)
+    with os.scandir(source_folder) as it:
+        folders = [
+            entry for entry in it
+            if entry.is_dir(follow_symlinks=False) and entry.path != destination_folder
+        ]
 
     for folder in folders:
-        shutil.move(folder, destination_folder)
+        os.rename(folder.path, os.path.join(destination_folder, folder.name))
 
     return destination_folder
 
 
-async def post_art_poster(user:dict, meta:dict):
+async def post_art_poster(user:UserCtx, meta:dict):
     """
     Post album/playlist art as image
     Args:
@@ -293,9 +489,9 @@ async def post_art_poster(user:dict, meta:dict):
     """
     photo = meta['cover']
     if meta['type'] == 'album':
-        caption = await format_string(lang.s.ALBUM_TEMPLATE, meta, user)
+        caption = format_string(lang.s.ALBUM_TEMPLATE, meta, user)
     else:
-        caption = await format_string(lang.s.PLAYLIST_TEMPLATE, meta, user)
+        caption = format_string(lang.s.PLAYLIST_TEMPLATE, meta, user)
     
     if bot_set.art_poster:
         return await send_message(user, photo, 'pic', caption)
@@ -310,7 +506,7 @@ async def create_simple_text(meta, user):
     Returns:
         Formatted caption text
     """
-    return await format_string(
+    return format_string(
         lang.s.SIMPLE_TITLE.format(
             meta['title'],
             meta['type'].title(),
@@ -355,6 +551,10 @@ async def post_simple_message(user, meta, r_link=None, i_link=None):
     return await send_message(user, caption, markup=markup)
 
 
+# Ten-segment progress bars indexed by filled segment count
+_BARS = tuple("▰" * i + "▱" * (10 - i) for i in range(11))
+
+
 async def progress_message(done, total, details):
     """
     Update progress message
@@ -363,13 +563,7 @@ async def progress_message(done, total, details):
         total: Total items
         details: Progress message details
     """
-    filled = math.floor((done / total) * 10)
-    empty = 10 - filled
-    
-    progress_bar = "{0}{1}".format(
-        ''.join(["▰" for _ in range(filled)]),
-        ''.join(["▱" for _ in range(empty)])
-    )
+    progress_bar = _BARS[min(10, done * 10 // total)]
 
     try:
         await edit_message(
@@ -388,6 +582,11 @@ async def progress_message(done, total, details):
         pass  # Skip update during flood limits
 
 
+async def _rmtree(path):
+    """Remove a directory tree off the event loop, ignoring missing paths"""
+    await asyncio.to_thread(shutil.rmtree, path, ignore_errors=True)
+
+
 async def cleanup(user=None, metadata=None):
     """
     Clean up downloaded files
@@ -397,10 +596,10 @@ async def cleanup(user=None, metadata=None):
     """
     if metadata:
         try:
+            folderpath = metadata.get('folderpath', '')
             # Apple Music specific cleanup
-            if "Apple Music" in metadata.get('folderpath', ''):
-                if os.path.exists(metadata['folderpath']):
-                    shutil.rmtree(metadata['folderpath'], ignore_errors=True)
+            if "Apple Music" in folderpath:
+                await _rmtree(folderpath)
                 return
             
             # Existing cleanup for other providers
@@ -412,39 +611,35 @@ async def cleanup(user=None, metadata=None):
                 is_zip = bot_set.playlist_zip
                 
             if is_zip:
-                paths = metadata['folderpath'] if isinstance(metadata['folderpath'], list) else [metadata['folderpath']]
+                paths = folderpath if isinstance(folderpath, list) else [folderpath]
                 for path in paths:
                     try:
-                        if os.path.exists(path):
-                            os.remove(path)
+                        await asyncio.to_thread(os.remove, path)
                     except:
                         pass
             else:
-                if os.path.exists(metadata['folderpath']):
-                    shutil.rmtree(metadata['folderpath'], ignore_errors=True)
+                await _rmtree(folderpath)
         except Exception as e:
             LOGGER.info(f"Metadata cleanup error: {str(e)}")
     
     if user:
+        base_dir = Config.DOWNLOAD_BASE_DIR
         try:
             # Clean up Apple Music directory
-            apple_dir = os.path.join(Config.LOCAL_STORAGE, "Apple Music", str(user['user_id']))
-            if os.path.exists(apple_dir):
-                shutil.rmtree(apple_dir, ignore_errors=True)
+            apple_dir = os.path.join(Config.LOCAL_STORAGE, "Apple Music", str(user.user_id))
+            await _rmtree(apple_dir)
         except Exception as e:
             LOGGER.info(f"Apple cleanup error: {str(e)}")
         
         try:
             # Clean up old-style directories
-            old_dir = f"{Config.DOWNLOAD_BASE_DIR}/{user['r_id']}/"
-            if os.path.exists(old_dir):
-                shutil.rmtree(old_dir, ignore_errors=True)
+            old_dir = f"{base_dir}/{user.r_id}/"
+            await _rmtree(old_dir)
         except Exception as e:
             LOGGER.info(f"Old dir cleanup error: {str(e)}")
         
         try:
-            temp_dir = f"{Config.DOWNLOAD_BASE_DIR}/{user['r_id']}-temp/"
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir, ignore_errors=True)
+            temp_dir = f"{base_dir}/{user.r_id}-temp/"
+            await _rmtree(temp_dir)
         except Exception as e:
             LOGGER.info(f"Temp dir cleanup error: {str(e)}")
@@ -13,7 +13,7 @@ from ..helpers.qobuz.handler import start_qobuz
 from ..helpers.tidal.handler import start_tidal
 from ..helpers.deezer.handler import start_deezer
 from ..providers.apple import start_apple
-from ..helpers.message import send_message, antiSpam, check_user, fetch_user_details, edit_message
+from ..helpers.message import send_message, antiSpam, check_user, fetch_user_details, edit_message, UserCtx
 
 
 @Client.on_message(filters.command(CMD.DOWNLOAD))
@@ -42,9 +42,9 @@ async def download_track(c, msg: Message):
         
         spam = await antiSpam(msg.from_user.id, msg.chat.id)
         if not spam:
-            user = await fetch_user_details(msg, reply)
-            user['link'] = link
-            user['bot_msg'] = await send_message(msg, 'Starting download...')
+            user = fetch_user_details(msg, reply)
+            user.link = link
+            user.bot_msg = await send_message(msg, 'Starting download...')
             try:
                 await start_link(link, user, options)
                 await send_message(user, lang.s.TASK_COMPLETED)
@@ -53,7 +53,7 @@ async def download_track(c, msg: Message):
                 # USE SAFE ERROR MESSAGING
                 error_msg = f"Download failed: {str(e)}"
                 await send_message(user, error_msg)
-            await c.delete_messages(msg.chat.id, user['bot_msg'].id)
+            await c.delete_messages(msg.chat.id, user.bot_msg.id)
             await cleanup(user)  # deletes uploaded files
             await antiSpam(msg.from_user.id, msg.chat.id, True)
 
@@ -76,7 +76,7 @@ def parse_options(parts: list) -> dict:
     return options
 
 
-async def start_link(link: str, user: dict, options: dict = None):
+async def start_link(link: str, user: UserCtx, options: dict = None):
     """
     Route download request to appropriate provider handler
     """
@@ -91,13 +91,13 @@ async def start_link(link: str, user: dict, options: dict = None):
     elif link.startswith(tuple(deezer)):
         await start_deezer(link, user)
     elif link.startswith(tuple(qobuz)):
-        user['provider'] = 'Qobuz'
+        user.provider = 'Qobuz'
         await start_qobuz(link, user)
     elif link.startswith(tuple(spotify)):
         return 'spotify'
     elif link.startswith(tuple(apple_music)):
-        user['provider'] = 'Apple'
-        await edit_message(user['bot_msg'], "Starting Apple Music download...")
+        user.provider = 'Apple'
+        await edit_message(user.bot_msg, "Starting Apple Music download...")
         await start_apple(link, user, options)
     else:
         await send_message(user, lang.s.ERR_UNSUPPORTED_LINK)
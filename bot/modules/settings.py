@@ -14,7 +14,7 @@ from ..helpers.message import send_message, edit_message, check_user, fetch_user
 @Client.on_message(filters.command(CMD.SETTINGS))
 async def settings(c, message):
     if await check_user(message.from_user.id, restricted=True):
-        user = await fetch_user_details(message)
+        user = fetch_user_details(message)
         await send_message(user, lang.s.INIT_SETTINGS_PANEL, markup=main_menu())
 
 
@@ -202,11 +202,13 @@ async def ban(client:Client, msg:Message):
             if id in bot_set.auth_users:
                 bot_set.auth_users.remove(id)
                 set_db.set_variable('AUTH_USERS', str(bot_set.auth_users))
+                bot_set.rebuild_auth_set()
             else: await send_message(msg, lang.s.USER_DOEST_EXIST)
         else:
             if id in bot_set.auth_chats:
                 bot_set.auth_chats.remove(id)
                 set_db.set_variable('AUTH_CHATS', str(bot_set.auth_chats))
+                bot_set.rebuild_auth_set()
             else: await send_message(msg, lang.s.USER_DOEST_EXIST)
         await send_message(msg, lang.s.BAN_ID)
         
@@ -225,11 +227,13 @@ async def auth(client:Client, msg:Message):
             if id not in bot_set.auth_users:
                 bot_set.auth_users.append(id)
                 set_db.set_variable('AUTH_USERS', str(bot_set.auth_users))
+                bot_set.rebuild_auth_set()
             else: await send_message(msg, lang.s.USER_EXIST)
         else:
             if id not in bot_set.auth_chats:
                 bot_set.auth_chats.append(id)
                 set_db.set_variable('AUTH_CHATS', str(bot_set.auth_chats))
+                bot_set.rebuild_auth_set()
             else: await send_message(msg, lang.s.USER_EXIST)
         await send_message(msg, lang.s.AUTH_ID)
 
@@ -237,7 +241,7 @@ async def auth(client:Client, msg:Message):
 @Client.on_message(filters.command(CMD.LOG))
 async def send_log(client:Client, msg:Message):
     if await check_user(msg.from_user.id, restricted=True):
-        user = await fetch_user_details(msg)
+        user = fetch_user_details(msg)
         await send_message(
             user, 
             './bot/bot_logs.log',
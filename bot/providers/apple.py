@@ -11,6 +11,7 @@ from bot.helpers.utils import (
     format_string,
     cleanup
 )
+from bot.helpers.message import UserCtx
 from bot.helpers.database.pg_impl import download_history
 from config import Config
 from bot.logger import LOGGER
@@ -37,10 +38,10 @@ class AppleMusicProvider:
         match = re.search(r'/(album|song|playlist|music-video|artist)/[^/]+/(\d+)', url)
         return match.group(2) if match else "unknown"
     
-    async def process(self, url: str, user: dict, options: dict = None) -> dict:
+    async def process(self, url: str, user: UserCtx, options: dict = None) -> dict:
         """Process Apple Music URL with options"""
         # Create user-specific directory
-        user_dir = os.path.join(Config.LOCAL_STORAGE, str(user['user_id']), "Apple Music")
+        user_dir = os.path.join(Config.LOCAL_STORAGE, str(user.user_id), "Apple Music")
         os.makedirs(user_dir, exist_ok=True)
         LOGGER.info(f"Created Apple Music directory: {user_dir}")
         
@@ -48,7 +49,7 @@ class AppleMusicProvider:
         cmd_options = self.build_options(options)
         
         # Update user message
-        await edit_message(user['bot_msg'], "⏳ Starting Apple Music download...")
+        await edit_message(user.bot_msg, "⏳ Starting Apple Music download...")
         
         # Download content
         result = await run_apple_downloader(url, user_dir, cmd_options, user)
@@ -129,7 +130,7 @@ class AppleMusicProvider:
         album_title = items[0].get('album', items[0]['title'])
         
         download_history.record_download(
-            user_id=user['user_id'],
+            user_id=user.user_id,
             provider=self.name,
             content_type=content_type,
             content_id=content_id,
@@ -145,7 +146,7 @@ class AppleMusicProvider:
             'folderpath': folder_path,
             'title': album_title,
             'artist': items[0]['artist'],
-            'poster_msg': user['bot_msg']
+            'poster_msg': user.bot_msg
         }
     
     def build_options(self, options: dict) -> list:
@@ -177,18 +178,18 @@ class AppleMusicProvider:
         
         return cmd_options
 
-async def start_apple(link: str, user: dict, options: dict = None):
+async def start_apple(link: str, user: UserCtx, options: dict = None):
     """Handle Apple Music download request with options"""
     try:
         provider = AppleMusicProvider()
         if not provider.validate_url(link):
-            await edit_message(user['bot_msg'], "❌ Invalid Apple Music URL")
+            await edit_message(user.bot_msg, "❌ Invalid Apple Music URL")
             return
         
         # Process content with options
         result = await provider.process(link, user, options)
         if not result['success']:
-            await edit_message(user['bot_msg'], f"❌ Error: {result['error']}")
+            await edit_message(user.bot_msg, f"❌ Error: {result['error']}")
             return
         
         # Lazy import to break circular dependency
@@ -210,14 +211,14 @@ async def start_apple(link: str, user: dict, options: dict = None):
         elif result['type'] == 'playlist':
             await playlist_upload(result, user)
         else:
-            await edit_message(user['bot_msg'], f"❌ Unsupported content type: {result['type']}")
+            await edit_message(user.bot_msg, f"❌ Unsupported content type: {result['type']}")
             return
         
         # Final cleanup
         await cleanup(user)
-        await edit_message(user['bot_msg'], "✅ Apple Music download completed!")
+        await edit_message(user.bot_msg, "✅ Apple Music download completed!")
         
     except Exception as e:
         logger.error(f"Apple Music error: {str(e)}", exc_info=True)
-        await edit_message(user['bot_msg'], f"❌ Error: {str(e)}")
+        await edit_message(user.bot_msg, f"❌ Error: {str(e)}")
         await cleanup(user)
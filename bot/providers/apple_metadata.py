@@ -1,11 +1,21 @@
 import os
 import re
 import base64
+import shutil
+import hashlib
+from collections import OrderedDict
 import mutagen
 import mutagen.mp4
 import mutagen.flac
 from pathlib import Path
 from bot.logger import LOGGER
+from bot.helpers.utils import write_bytes
+
+COVER_DIRS = 64  # album folders whose covers are remembered for dedupe
+
+# album folder -> {cover digest: (first file written with it, its stat identity)},
+# least recently used folders are dropped past COVER_DIRS
+_cover_hashes: OrderedDict[str, dict] = OrderedDict()
 
 def extract_audio_metadata(file_path: str) -> dict:
     """
@@ -58,6 +68,19 @@ def extract_video_metadata(file_path: str) -> dict:
         LOGGER.error(f"Video metadata extraction failed: {str(e)}")
         return default_metadata(file_path)
 
+def _extract_other_metadata(file_path: str) -> dict:
+    """Handle other file types with mutagen"""
+    audio = mutagen.File(file_path)
+    return extract_generic_metadata(audio, file_path)
+
+# Extension -> metadata extractor used by extract_apple_metadata
+_HANDLERS = {
+    '.m4a': extract_audio_metadata,
+    '.mp4': extract_video_metadata,
+    '.m4v': extract_video_metadata,
+    '.mov': extract_video_metadata,
+}
+
 def extract_apple_metadata(file_path: str) -> dict:
     """
     Extract metadata from Apple Music files (audio or video)
@@ -67,14 +90,8 @@ def extract_apple_metadata(file_path: str) -> dict:
         Metadata dictionary
     """
     try:
-        if file_path.endswith('.m4a'):
-            return extract_audio_metadata(file_path)
-        elif file_path.endswith(('.mp4', '.m4v', '.mov')):
-            return extract_video_metadata(file_path)
-        else:
-            # Handle other file types with mutagen
-            audio = mutagen.File(file_path)
-            return extract_generic_metadata(audio, file_path)
+        handler = _HANDLERS.get(os.path.splitext(file_path)[1].lower(), _extract_other_metadata)
+        return handler(file_path)
     except Exception as e:
         LOGGER.error(f"Apple metadata extraction failed: {str(e)}")
         return default_metadata(file_path)
@@ -100,6 +117,46 @@ def extract_generic_metadata(audio, file_path):
         LOGGER.error(f"Generic metadata extraction failed: {str(e)}")
         return default_metadata(file_path)
 
+def _file_identity(path):
+    """Identity of a file on disk, changes whenever it is replaced or rewritten"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+def _save_cover(cover_path, data):
+    """Write cover art once per distinct image in a folder and hard-link identical covers to it"""
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    folder = os.path.dirname(cover_path)
+    covers = _cover_hashes.get(folder)
+    if covers is None:
+        covers = _cover_hashes[folder] = {}
+        if len(_cover_hashes) > COVER_DIRS:
+            _cover_hashes.popitem(last=False)
+    else:
+        _cover_hashes.move_to_end(folder)
+    
+    canonical = covers.get(digest)
+    # Only trust the file if it is still the one we wrote (not cleaned up and replaced)
+    if canonical and _file_identity(canonical[0]) != canonical[1]:
+        del covers[digest]
+        canonical = None
+    if canonical and canonical[0] == cover_path:
+        return
+    # unlink first so rewriting a linked path never truncates the shared inode
+    if os.path.lexists(cover_path):
+        os.remove(cover_path)
+    if canonical:
+        try:
+            os.link(canonical[0], cover_path)
+        except OSError:
+            # cross-device or no hard-link support
+            shutil.copyfile(canonical[0], cover_path)
+        return
+    write_bytes(cover_path, data)
+    covers[digest] = (cover_path, _file_identity(cover_path))
+
 def extract_cover_art(media, file_path):
     """
     Extract cover art from audio/video file
@@ -114,16 +171,14 @@ def extract_cover_art(media, file_path):
         if isinstance(media, mutagen.mp4.MP4) and 'covr' in media:
             cover_data = media['covr'][0]
             cover_path = f"{os.path.splitext(file_path)[0]}.jpg"
-            with open(cover_path, 'wb') as f:
-                f.write(cover_data)
+            _save_cover(cover_path, cover_data)
             return cover_path
         
         # Handle ID3 tags (MP3)
         elif hasattr(media, 'pictures') and media.pictures:
             cover_data = media.pictures[0].data
             cover_path = f"{os.path.splitext(file_path)[0]}.jpg"
-            with open(cover_path, 'wb') as f:
-                f.write(cover_data)
+            _save_cover(cover_path, cover_data)
             return cover_path
         
         # Handle FLAC/Vorbis comments
@@ -134,8 +189,7 @@ def extract_cover_art(media, file_path):
                     pic = mutagen.flac.Picture(data)
                     if pic.type == 3:  # Front cover
                         cover_path = f"{os.path.splitext(file_path)[0]}.jpg"
-                        with open(cover_path, 'wb') as f:
-                            f.write(pic.data)
+                        _save_cover(cover_path, pic.data)
                         return cover_path
                 except:
                     continue
@@ -1,36 +1,27 @@
 import os
-import re
+import time
 import asyncio
+import logging
 import subprocess
 import zipfile
+from collections import deque
 from config import Config
 from bot.logger import LOGGER
+from bot.helpers.message import UserCtx, edit_message
+from bot.helpers.utils import scan_files, zip_add_file, spawn, write_bytes
 from .apple_metadata import extract_apple_metadata, default_metadata
 
-async def run_apple_downloader(url: str, output_dir: str, options: list = None, user: dict = None) -> dict:
-    """
-    Execute Apple Music downloader script with config file setup
-    
-    Args:
-        url: Apple Music URL to download
-        output_dir: User-specific directory to save files
-        options: List of command-line options
-        user: User details for progress updates
-    
-    Returns:
-        dict: {'success': bool, 'error': str if failed}
-    """
-    # Create ALAC and Atmos subdirectories
-    alac_dir = os.path.join(output_dir, "alac")
-    atmos_dir = os.path.join(output_dir, "atmos")
-    os.makedirs(alac_dir, exist_ok=True)
-    os.makedirs(atmos_dir, exist_ok=True)
-    
-    # Create config file with user-specific paths
-    config_path = os.path.join(output_dir, "config.yaml")
-    
-    # Dynamic configuration with user-specific paths
-    config_content = f"""# Configuration for Apple Music downloader
+STDOUT_READ = 1 << 16  # bytes per downloader stdout read
+STREAM_LIMIT = 1 << 20  # max unterminated downloader output kept in memory
+STDOUT_TAIL = 50  # stdout lines kept for error messages
+PROGRESS_INTERVAL = 3.0  # min seconds between progress edits
+
+_NUMBER_BYTES = b'0123456789.'
+# Drops characters unsafe in filenames and turns spaces into underscores
+_SANITIZE_TABLE = str.maketrans(' ', '_', '\\/*?:"<>|')
+
+# Apple Music downloader config, filled in per user by run_apple_downloader
+_CONFIG_TEMPLATE = """# Configuration for Apple Music downloader
 lrc-type: "lyrics"
 lrc-format: "lrc"
 embed-lrc: true
@@ -47,8 +38,8 @@ get-m3u8-port: "127.0.0.1:20020"
 get-m3u8-from-device: true
 get-m3u8-mode: hires
 aac-type: aac-lc
-alac-max: {Config.APPLE_ALAC_QUALITY}
-atmos-max: {Config.APPLE_ATMOS_QUALITY}
+alac-max: {alac_q}
+atmos-max: {atmos_q}
 limit-max: 200
 album-folder-format: "{{AlbumName}}"
 playlist-folder-format: "{{PlaylistName}}"
@@ -65,9 +56,131 @@ mv-max: 2160
 alac-save-folder: {alac_dir}
 atmos-save-folder: {atmos_dir}
 """
+
+def _parse_progress(line: bytes):
+    """
+    Pull the last percentage figure (e.g. 42% or 99.5%) out of an output line
+    Args:
+        line: Raw downloader output line
+    Returns:
+        Whole percent, or None when the line has no percentage
+    """
+    end = line.rfind(b'%')
+    if end <= 0:
+        return None
+    start = end
+    while start > 0 and line[start - 1] in _NUMBER_BYTES:
+        start -= 1
+    try:
+        return int(float(line[start:end]))
+    except ValueError:
+        return None
+
+async def _report_progress(msg, progress: int):
+    """Best-effort progress edit, dropped when rate limited"""
+    try:
+        await edit_message(msg, f"Apple Music Download: {progress}%", None, False)
+    except Exception:
+        pass
+
+async def _pump_stdout(process, user: UserCtx = None) -> deque:
+    """
+    Read downloader stdout to EOF, logging it and relaying progress
+    Args:
+        process: Running downloader process
+        user: User details for progress updates
+    Returns:
+        Last stdout lines, kept for error reporting
+    """
+    # The downloader redraws its progress bar with \r and only ends the line
+    # once a track is done, so read fixed-size chunks and split on both \r
+    # and \n ourselves. Only a short tail is kept around for error reporting
+    debug = LOGGER.isEnabledFor(logging.DEBUG)
+    stdout_tail = deque(maxlen=STDOUT_TAIL)
+    # Progress edits are throttled and sent in the background so a slow
+    # Telegram round-trip never stalls draining the pipe
+    last_sent_pct = -1
+    last_sent_ts = 0.0
+    edit_task = None
+    pending = b''
+    try:
+        while True:
+            chunk = await process.stdout.read(STDOUT_READ)
+            if not chunk:
+                segments = [pending]
+            else:
+                segments = (pending + chunk).replace(b'\r', b'\n').split(b'\n')
+                # Carry the unterminated fragment over, bounded by STREAM_LIMIT
+                pending = segments.pop()
+                if len(pending) > STREAM_LIMIT:
+                    segments.append(pending)
+                    pending = b''
+            
+            for raw in segments:
+                if not raw:
+                    continue
+                stdout_tail.append(raw)
+                if debug:
+                    LOGGER.debug(f"Apple Downloader: {raw.decode(errors='ignore').rstrip()}")
+                
+                # Process segment for progress updates
+                if user and user.bot_msg:
+                    progress = _parse_progress(raw)
+                    if progress is not None:
+                        now = time.monotonic()
+                        if (progress != last_sent_pct and now - last_sent_ts >= PROGRESS_INTERVAL
+                                and (edit_task is None or edit_task.done())):
+                            last_sent_pct, last_sent_ts = progress, now
+                            edit_task = spawn(_report_progress(user.bot_msg, progress))
+            
+            if not chunk:
+                break
+    except Exception as e:
+        # Nobody drains stdout any more, so stop the downloader instead of
+        # leaving process.wait() blocked on a full pipe
+        LOGGER.error(f"Apple downloader stdout read failed: {str(e)}")
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+    return stdout_tail
+
+async def _pump_stderr(process) -> str:
+    """Read downloader stderr to EOF"""
+    stderr = await process.stderr.read()
+    return stderr.decode(errors='ignore').strip()
+
+async def run_apple_downloader(url: str, output_dir: str, options: list = None, user: UserCtx = None) -> dict:
+    """
+    Execute Apple Music downloader script with config file setup
     
-    with open(config_path, 'w') as config_file:
-        config_file.write(config_content)
+    Args:
+        url: Apple Music URL to download
+        output_dir: User-specific directory to save files
+        options: List of command-line options
+        user: User details for progress updates
+    
+    Returns:
+        dict: {'success': bool, 'error': str if failed}
+    """
+    # Create ALAC and Atmos subdirectories
+    alac_dir = os.path.join(output_dir, "alac")
+    atmos_dir = os.path.join(output_dir, "atmos")
+    os.makedirs(alac_dir, exist_ok=True)
+    os.makedirs(atmos_dir, exist_ok=True)
+    
+    # Create config file with user-specific paths
+    config_path = os.path.join(output_dir, "config.yaml")
+    
+    # Fill the static template with user-specific paths
+    config_content = _CONFIG_TEMPLATE.format(
+        alac_q=Config.APPLE_ALAC_QUALITY,
+        atmos_q=Config.APPLE_ATMOS_QUALITY,
+        alac_dir=alac_dir,
+        atmos_dir=atmos_dir
+    ).encode()
+    
+    write_bytes(config_path, config_content)
     
     LOGGER.info(f"Created Apple Music config at: {config_path}")
     
@@ -87,40 +200,14 @@ atmos-save-folder: {atmos_dir}
         stderr=asyncio.subprocess.PIPE
     )
     
-    # Read output in chunks to avoid buffer overrun
-    stdout_chunks = []
-    while True:
-        chunk = await process.stdout.read(4096)  # Read 4KB chunks
-        if not chunk:
-            break
-        stdout_chunks.append(chunk)
-        
-        # Process chunk for progress updates
-        chunk_str = chunk.decode(errors='ignore')
-        if user and 'bot_msg' in user:
-            # Look for progress in the chunk
-            progress_match = re.search(r'(\d+)%', chunk_str)
-            if progress_match:
-                try:
-                    progress = int(progress_match.group(1))
-                    await edit_message(
-                        user['bot_msg'],
-                        f"Apple Music Download: {progress}%"
-                    )
-                except:
-                    pass
-    
-    # Combine all chunks
-    stdout_output = b''.join(stdout_chunks).decode(errors='ignore')
-    stdout_lines = stdout_output.splitlines()
-    
-    # Log all output lines
-    for line in stdout_lines:
-        LOGGER.debug(f"Apple Downloader: {line}")
-    
-    # Wait for process to finish
-    stderr = await process.stderr.read()
-    stderr = stderr.decode().strip()
+    # Drain both pipes concurrently: a downloader filling the stderr pipe
+    # while we wait on stdout EOF would otherwise deadlock
+    stdout_tail, stderr, _ = await asyncio.gather(
+        _pump_stdout(process, user),
+        _pump_stderr(process),
+        process.wait()
+    )
+    stdout_lines = [raw.decode(errors='ignore') for raw in stdout_tail]
     
     # Check return code
     if process.returncode != 0:
@@ -130,6 +217,20 @@ atmos-save-folder: {atmos_dir}
     
     return {'success': True}
 
+def _build_zip_sync(directory: str, zip_path: str):
+    """
+    Write the contents of a directory into a zip file
+    Args:
+        directory: Path to the content directory
+        zip_path: Path of the zip to create
+    """
+    directory = directory.rstrip(os.sep)
+    base_len = len(directory) + 1
+    # Media stored as-is, text deflated at level 1, copied in 1 MiB blocks
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_STORED, allowZip64=True, compresslevel=1) as zipf:
+        for entry in scan_files(directory):
+            zip_add_file(zipf, entry.path, entry.path[base_len:], entry.stat())
+
 async def create_apple_zip(directory: str, user_id: int, metadata: dict) -> str:
     """
     Create zip file with descriptive name for downloads
@@ -146,8 +247,7 @@ async def create_apple_zip(directory: str, user_id: int, metadata: dict) -> str:
     provider = metadata.get('provider', 'Apple Music')
     
     # Sanitize the content name for filesystem safety
-    safe_name = re.sub(r'[\\/*?:"<>|]', "", content_name)
-    safe_name = safe_name.replace(' ', '_')[:100]  # Limit length
+    safe_name = content_name.translate(_SANITIZE_TABLE)[:100]  # Limit length
     
     # If name is empty after sanitization, use fallback
     if not safe_name.strip():
@@ -168,21 +268,18 @@ async def create_apple_zip(directory: str, user_id: int, metadata: dict) -> str:
     
     # Create zip path in the content's directory
     zip_dir = os.path.dirname(directory)
-    zip_path = os.path.join(zip_dir, f"{zip_name}.zip")
     
-    # Ensure unique filename
+    # Ensure unique filename, checked against one directory listing
+    existing = set(os.listdir(zip_dir))
+    zip_file = f"{zip_name}.zip"
     counter = 1
-    while os.path.exists(zip_path):
-        zip_path = os.path.join(zip_dir, f"{zip_name}_{counter}.zip")
+    while zip_file in existing:
+        zip_file = f"{zip_name}_{counter}.zip"
         counter += 1
+    zip_path = os.path.join(zip_dir, zip_file)
     
-    # Create the zip file
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for root, _, files in os.walk(directory):
-            for file in files:
-                file_path = os.path.join(root, file)
-                arcname = os.path.relpath(file_path, directory)
-                zipf.write(file_path, arcname)
+    # Zipping is blocking file I/O, keep it off the event loop
+    await asyncio.to_thread(_build_zip_sync, directory, zip_path)
     
     LOGGER.info(f"Created descriptive zip: {zip_path}")
     return zip_path
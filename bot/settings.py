@@ -2,8 +2,8 @@ import os
 import sys
 import json
 import base64
+import asyncio
 import requests
-import subprocess
 
 # Add bot directory to sys.path for proper import resolution
 bot_dir = os.path.dirname(os.path.abspath(__file__))
@@ -43,6 +43,7 @@ class BotSettings:
     def __init__(self):
         self.deezer = False
         self.qobuz = False
+        self.tidal = False
         # Add this line to initialize can_enable_tidal
         self.can_enable_tidal = Config.ENABLE_TIDAL and Config.ENABLE_TIDAL.lower() == "true"
         self.admins = Config.ADMINS
@@ -54,6 +55,7 @@ class BotSettings:
         self.auth_users = json.loads(db_users) if db_users else []
         db_chats, _ = set_db.get_variable('AUTH_CHATS')
         self.auth_chats = json.loads(db_chats) if db_chats else []
+        self.rebuild_auth_set()
 
         self.rclone = False
         self.check_upload_mode()
@@ -79,6 +81,10 @@ class BotSettings:
         self.clients = []
         self.download_history = download_history
 
+    def rebuild_auth_set(self):
+        """Rebuild the lookup set of admins + authorized users/chats"""
+        self.auth_set = set(self.admins) | set(self.auth_chats) | set(self.auth_users)
+
     def check_upload_mode(self):
         """Determine upload mode based on configuration"""
         if os.path.exists('rclone.conf'):
@@ -117,14 +123,8 @@ class BotSettings:
             'atmos_quality': int(__getvalue__('APPLE_ATMOS_QUALITY') or Config.APPLE_ATMOS_QUALITY)
         }
         
-        # Ensure downloader is installed
-        if not os.path.exists(Config.DOWNLOADER_PATH):
-            LOGGER.warning("Apple Music downloader not found! Attempting installation...")
-            try:
-                subprocess.run([Config.INSTALLER_PATH], check=True)
-                LOGGER.info("Apple Music downloader installed successfully")
-            except Exception as e:
-                LOGGER.error(f"Apple Music installer failed: {str(e)}")
+        # Installing a missing downloader is left to main.prepare_downloader,
+        # which runs the installer without blocking the event loop
 
     async def login_qobuz(self):
         """Initialize Qobuz client"""
@@ -213,16 +213,23 @@ class BotSettings:
                 lang.s = item
                 break
                 
-    async def close_sessions(self):
-        """Close all provider sessions"""
-        if self.qobuz:
-            await self.qobuz.session.close()
-            LOGGER.info("Closed Qobuz session")
-        if self.deezer:
-            await self.deezer.session.close()
-            LOGGER.info("Closed Deezer session")
-        if self.tidal:
-            await self.tidal.session.close()
-            LOGGER.info("Closed Tidal session")
+    async def close_sessions(self, timeout=5):
+        """Close all provider sessions concurrently, each bounded by a timeout"""
+        providers = [
+            (name, client) for name, client in
+            (('Qobuz', self.qobuz), ('Deezer', self.deezer), ('Tidal', self.tidal))
+            if client
+        ]
+        results = await asyncio.gather(
+            *(asyncio.wait_for(client.session.close(), timeout) for _, client in providers),
+            return_exceptions=True
+        )
+        for (name, _), result in zip(providers, results):
+            if isinstance(result, asyncio.TimeoutError):
+                LOGGER.warning(f"Timed out closing {name} session")
+            elif isinstance(result, Exception):
+                LOGGER.warning(f"Failed to close {name} session: {str(result)}")
+            else:
+                LOGGER.info(f"Closed {name} session")
 
 bot_set = BotSettings()
@@ -11,7 +11,8 @@ class Bot(Client):
             bot_token=Config.TG_BOT_TOKEN,
             plugins=plugins,  # Use the imported plugins
             workdir=Config.WORK_DIR,
-            workers=Config.MAX_WORKERS
+            workers=Config.MAX_WORKERS,
+            max_concurrent_transmissions=Config.MAX_TRANSMISSIONS
         )
 
 # Create client instance
@@ -72,6 +72,7 @@ class Config:
 
     # Concurrent Workers
     MAX_WORKERS      = int(getenv("MAX_WORKERS", 5))                       # Number of threads (int)
+    MAX_TRANSMISSIONS = int(getenv("MAX_TRANSMISSIONS", 8))                # Concurrent MTProto file transfers (int)
 
     # Apple Music Configuration
     DOWNLOADER_PATH   = getenv("DOWNLOADER_PATH", "/usr/src/app/downloader/am_downloader.sh")  
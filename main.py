@@ -3,8 +3,9 @@ import os
 import sys
 import asyncio
 import logging
+import stat
 import signal
-import subprocess
+from functools import partial
 
 # Set up paths
 project_root = os.path.dirname(os.path.abspath(__file__))
@@ -21,24 +22,80 @@ async def shutdown(signal, loop):
     """Cleanup tasks tied to the service's shutdown."""
     logger.info(f"Received exit signal {signal.name}...")
     
+    # Cancel the bot's own background work before tearing down clients
+    from bot.helpers.utils import cancel_background_tasks, close_session
+    await cancel_background_tasks()
+    
     # Close all provider sessions
     from bot.settings import bot_set
     await bot_set.close_sessions()
+    await close_session()
     
-    # Stop Pyrogram client
+    # Stop Pyrogram client, asyncio.run cancels whatever is left on exit
     from bot import tgclient
     await tgclient.aio.stop()
     
-    # Cancel all tasks
-    tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
-    [task.cancel() for task in tasks]
-    logger.info(f"Cancelling {len(tasks)} outstanding tasks")
-    await asyncio.gather(*tasks, return_exceptions=True)
+    # Stop on the next loop iteration, after this coroutine has returned
+    loop.call_soon_threadsafe(loop.stop)
+
+def on_signal(sig, loop):
+    """Schedule shutdown from a loop signal handler"""
+    loop.create_task(shutdown(sig, loop))
+
+async def install_downloader():
+    """Run the Apple Music installer without blocking the event loop"""
+    from config import Config
+    logger.warning("Apple Music downloader not found! Attempting installation...")
+    try:
+        proc = await asyncio.create_subprocess_exec(Config.INSTALLER_PATH)
+        if await proc.wait() != 0:
+            raise RuntimeError(f"installer exited with code {proc.returncode}")
+        logger.info("Apple Music downloader installed successfully")
+    except Exception as e:
+        logger.error(f"Apple Music installer failed: {str(e)}")
+
+def ensure_executable(path) -> bool:
+    """
+    Make the downloader executable, skipping chmod on warm starts
+    Args:
+        path: Downloader binary path
+    Returns:
+        False if the binary is missing
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False
     
-    loop.stop()
+    if stat.S_IMODE(st.st_mode) & 0o111 == 0:
+        try:
+            os.chmod(path, 0o755)
+            logger.info(f"Set execute permissions on: {path}")
+        except Exception as e:
+            logger.error(f"Failed to set permissions: {str(e)}")
+    return True
+
+async def prepare_downloader():
+    """Install the Apple Music downloader if missing and make it executable"""
+    from config import Config
+    # Filesystem work runs in a thread so signal handlers stay live
+    if not await asyncio.to_thread(ensure_executable, Config.DOWNLOADER_PATH):
+        await install_downloader()
+        if not await asyncio.to_thread(ensure_executable, Config.DOWNLOADER_PATH):
+            logger.error(f"Apple Music downloader still missing at {Config.DOWNLOADER_PATH} after install")
 
 async def main():
     """Main entry point for the bot"""
+    # Set up signal handlers before any startup work
+    loop = asyncio.get_running_loop()
+    signals = (signal.SIGHUP, signal.SIGTERM, signal.SIGINT)
+    for s in signals:
+        try:
+            loop.add_signal_handler(s, partial(on_signal, s, loop))
+        except NotImplementedError:
+            # No loop signal handlers on Windows, Ctrl-C ends up as KeyboardInterrupt
+            break
+    
     from bot import tgclient, settings
     from config import Config
     from pyrogram import idle
@@ -46,41 +103,25 @@ async def main():
     # Initialize bot settings
     bot_set = settings.bot_set
     
-    # Set up signal handlers
-    loop = asyncio.get_running_loop()
-    signals = (signal.SIGHUP, signal.SIGTERM, signal.SIGINT)
-    for s in signals:
-        loop.add_signal_handler(
-            s, 
-            lambda s=s: asyncio.create_task(shutdown(s, loop))
-        )
-    
     # Ensure download directory exists
     if not os.path.isdir(Config.LOCAL_STORAGE):
         os.makedirs(Config.LOCAL_STORAGE)
         logger.info(f"Created download directory: {Config.LOCAL_STORAGE}")
     
     # Initialize Apple Music downloader
-    if not os.path.exists(Config.DOWNLOADER_PATH):
-        logger.warning("Apple Music downloader not found! Attempting installation...")
-        try:
-            subprocess.run([Config.INSTALLER_PATH], check=True)
-            logger.info("Apple Music downloader installed successfully")
-        except Exception as e:
-            logger.error(f"Apple Music installer failed: {str(e)}")
-    
-    # Set execute permissions
-    if os.path.exists(Config.DOWNLOADER_PATH):
-        try:
-            os.chmod(Config.DOWNLOADER_PATH, 0o755)
-            logger.info(f"Set execute permissions on: {Config.DOWNLOADER_PATH}")
-        except Exception as e:
-            logger.error(f"Failed to set permissions: {str(e)}")
+    await prepare_downloader()
     
-    # Initialize providers
-    await bot_set.login_qobuz()
-    await bot_set.login_deezer()
-    await bot_set.login_tidal()
+    # Initialize providers concurrently, one failure doesn't skip the others
+    providers = ('Qobuz', 'Deezer', 'Tidal')
+    results = await asyncio.gather(
+        bot_set.login_qobuz(),
+        bot_set.login_deezer(),
+        bot_set.login_tidal(),
+        return_exceptions=True
+    )
+    for name, result in zip(providers, results):
+        if isinstance(result, Exception):
+            logger.error(f"{name} login failed: {str(result)}")
     
     # Start the bot
     logger.info("Starting Apple Music Downloader Bot...")